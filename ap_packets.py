@@ -1,4 +1,81 @@
 from enum import StrEnum, IntEnum
+from collections import OrderedDict
+from collections.abc import Iterator
+from datapackage import DataPackageCache
+import json
+
+class JSONCodec:
+    # Stdlib fallback, always available
+    name: str = 'json'
+
+    def loads(self, message: str | bytes) -> any:
+        return json.loads(message)
+
+    def dumps(self, data: any) -> str:
+        return json.dumps(data, separators=(',', ':'))
+
+class OrjsonCodec(JSONCodec):
+    name: str = 'orjson'
+
+    def __init__(self) -> None:
+        import orjson
+        self.orjson = orjson
+
+    def loads(self, message: str | bytes) -> any:
+        return self.orjson.loads(message)
+
+    def dumps(self, data: any) -> str:
+        # Text frames, the server expects JSON as text
+        return self.orjson.dumps(data).decode()
+
+class MsgspecCodec(JSONCodec):
+    name: str = 'msgspec'
+
+    def __init__(self) -> None:
+        import msgspec
+        self.decoder = msgspec.json.Decoder()
+        self.encoder = msgspec.json.Encoder()
+
+    def loads(self, message: str | bytes) -> any:
+        return self.decoder.decode(message)
+
+    def dumps(self, data: any) -> str:
+        return self.encoder.encode(data).decode()
+
+CODECS: dict[str, type[JSONCodec]] = {
+    'orjson': OrjsonCodec,
+    'msgspec': MsgspecCodec,
+    'json': JSONCodec,
+}
+
+def get_codec(name: str | None = None) -> JSONCodec:
+    # Picks the fastest installed backend, or the named one
+    names: list[str] = [name] if name is not None else list(CODECS)
+    for codec_name in names:
+        try:
+            return CODECS[codec_name]()
+        except ImportError:
+            continue
+    if name is not None:
+        print(f'JSON codec \'{name}\' is not installed, using json')
+    return JSONCodec()
+
+class FrameField:
+    # Reads a key from the raw frame when accessed instead of copying every field up front
+    def __init__(self, key: str | None = None, default: any = ...) -> None:
+        self.key: str | None = key
+        self.default: any = default
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        if self.key is None:
+            self.key = name
+
+    def __get__(self, packet: 'APPacket | None', owner: type) -> any:
+        if packet is None:
+            return self
+        if self.default is ...:
+            return packet.data[self.key]
+        return packet.data.get(self.key, self.default)
 
 class PacketDirection(StrEnum):
     Incoming = 'Incoming'
@@ -13,27 +90,37 @@ class IncAPCommands(StrEnum):
     LocationInfo = 'LocationInfo'
     Bounced = 'Bounced'
     RoomUpdate = 'RoomUpdate'
+    DataPackage = 'DataPackage'
+    ReceivedItems = 'ReceivedItems'
+    SetReply = 'SetReply'
+    InvalidPacket = 'InvalidPacket'
 
 class APPacket:
-    def __init__(self, cmd: str, packet_direction: str):
+    __slots__ = ('cmd', 'packet_direction', 'response', 'data')
+
+    def __init__(self, cmd: str, packet_direction: str, data: dict[str, any] | None = None):
         self.cmd: str = cmd
         self.packet_direction: str = packet_direction
         self.response: dict[str, any] = {}
+        self.data: dict[str, any] | None = data # The raw frame, for incoming packets
 
 class IncRoomInfo(APPacket):
+    __slots__ = ()
+
+    password: bool = FrameField()
+    games: list[str] = FrameField()
+    tags: list[str] = FrameField()
+    version: dict[str, int | str] = FrameField()
+    generator_version: dict[str, int | str] = FrameField()
+    permissions: dict[str, int] = FrameField()
+    hint_cost: int = FrameField()
+    location_check_points: int = FrameField()
+    datapackage_checksums: dict[str, str] = FrameField(default={})
+    seed_name: str = FrameField()
+    time: str = FrameField()
+
     def __init__(self, data: dict, packet_direction: str = PacketDirection.Incoming):
-        super().__init__(data['cmd'], packet_direction)
-        self.password: bool = data['password']
-        self.games: list[str] = data['games']
-        self.tags: list[str] = data['tags']
-        self.version: dict[str, int | str] = data['version']
-        self.generator_version: dict[str, int | str] = data['generator_version']
-        self.permissions: dict[str, int] = data['permissions']
-        self.hint_cost: int = data['hint_cost']
-        self.location_check_points: int = data['location_check_points']
-        self.datapackage_checksums: dict[str, str] = data['datapackage_checksums']
-        self.seed_name: str = data['seed_name']
-        self.time: str = data['time']
+        super().__init__(data['cmd'], packet_direction, data)
 
     def create_response(self, slot_name: str, password: str, uuid: int, version: dict[str, int | str], client_name_tag: str = "APNothing") -> None:
         self.response: dict[str, any] = {
@@ -52,9 +139,12 @@ class IncRoomInfo(APPacket):
         }
 
 class IncConnectionRefused(APPacket):
+    __slots__ = ('error_messages',)
+
+    errors: list[str] = FrameField(default=[])
+
     def __init__(self, data: dict, packet_direction: str = PacketDirection.Incoming):
-        super().__init__(data['cmd'], packet_direction)
-        self.errors: list[str] = data['errors']
+        super().__init__(data['cmd'], packet_direction, data)
         self.error_messages: list[str] = []
 
         self.__process_error_messages()
@@ -68,6 +158,8 @@ class IncConnectionRefused(APPacket):
                     self.error_messages.append(f'Unknown Error: \'{error}\'')
 
 class APNetworkPlayer:
+    __slots__ = ('team', 'slot', 'alias', 'name')
+
     def __init__(self, team: int, slot: int, alias: str, name: str):
         self.team: int = team
         self.slot: int = slot
@@ -81,81 +173,136 @@ class APNetworkItemType(IntEnum):
     PROGRESSION_SKIP_BALANCING = 3
     TRAP = 4
 
+ITEM_TYPES: dict[int, APNetworkItemType] = {item_type.value: item_type for item_type in APNetworkItemType} # Dict lookup is much cheaper than calling the enum
+
 class APNetworkItem:
+    __slots__ = ('item_id', 'location_id', 'player_id', 'player_is_receiving', 'type')
+
     def __init__(self, item_id: int, location_id: int, player_id: int, flags: int, player_is_receiving: bool = False):
         self.item_id: int = item_id
         self.location_id: int = location_id
         self.player_id: int = player_id
         self.player_is_receiving: bool = player_is_receiving # Usually False, except for in LocationInfo. Denotes if the player id is the player who has the item in their world (False) or the player the item is for (True). (This is stupid AP why the inconsistency???)
-        self.type: int = APNetworkItemType(flags)
+        try:
+            self.type: APNetworkItemType = ITEM_TYPES[flags]
+        except KeyError:
+            self.type = APNetworkItemType(flags)
 
 
 class IncConnected(APPacket):
+    __slots__ = ('players_cache',)
+
+    team: int = FrameField()
+    slot: int = FrameField()
+    missing_locations: list[int] = FrameField()
+    checked_locations: list[int] = FrameField()
+    slot_info: dict[str, dict[str, str | int | list]] = FrameField()
+    hint_points: int = FrameField()
+    slot_data: dict[str, any] = FrameField(default={})
+
     def __init__(self, data: dict, packet_direction: str = PacketDirection.Incoming):
-        super().__init__(data['cmd'], packet_direction)
-        self.team: int = data['team']
-        self.slot: int = data['slot']
-        self.missing_locations: list[int] = data['missing_locations']
-        self.checked_locations: list[int] = data['checked_locations']
-        self.slot_info: dict[str, dict[str, str | int | list]] = data['slot_info']
-        self.hint_points: int = data['hint_points']
-        self.slot_data: dict[str, any] = data['slot_data']
-        
-        self.players: list[APNetworkPlayer] = []
-        
-        for player in data['players']:
-            if player['class'] == 'NetworkPlayer':
-                self.players.append(APNetworkPlayer(player['team'], player['slot'], player['alias'], player['name']))
+        super().__init__(data['cmd'], packet_direction, data)
+        self.players_cache: list[APNetworkPlayer] | None = None
+
+    @property
+    def players(self) -> list[APNetworkPlayer]:
+        if self.players_cache is None:
+            self.players_cache = [APNetworkPlayer(player['team'], player['slot'], player['alias'], player['name']) for player in self.data['players'] if player['class'] == 'NetworkPlayer']
+        return self.players_cache
 
 class PrintJSONMessageTypes(StrEnum):
+    ItemSend = 'ItemSend'
+    ItemCheat = 'ItemCheat'
+    Hint = 'Hint'
     Join = 'Join'
+    Part = 'Part'
+    Chat = 'Chat'
+    ServerChat = 'ServerChat'
     Tutorial = 'Tutorial'
-    Hint = 'Hint'
+    TagsChanged = 'TagsChanged'
+    CommandResult = 'CommandResult'
+    AdminCommandResult = 'AdminCommandResult'
+    Goal = 'Goal'
+    Release = 'Release'
+    Collect = 'Collect'
+    Countdown = 'Countdown'
+
+class PrintJSONRenderer:
+    __slots__ = ('players_by_slot', 'datapackage', 'checksums', 'slot_games', 'cache_size', 'cache')
+
+    def __init__(self, players_by_slot: dict[int, APNetworkPlayer] | None = None, datapackage: DataPackageCache | None = None, slot_games: dict[int, str] | None = None, cache_size: int = 256, checksums: dict[str, str] | None = None):
+        self.players_by_slot: dict[int, APNetworkPlayer] = players_by_slot if players_by_slot is not None else {}
+        self.datapackage: DataPackageCache | None = datapackage
+        self.checksums: dict[str, str] = checksums if checksums is not None else {} # Game -> DataPackage checksum in this session's room
+        self.slot_games: dict[int, str] = slot_games if slot_games is not None else {}
+
+        self.cache_size: int = cache_size
+        self.cache: OrderedDict[tuple, str] = OrderedDict() # LRU of rendered messages, hints are often broadcast repeatedly
+
+    def set_players(self, players_by_slot: dict[int, APNetworkPlayer], slot_games: dict[int, str]) -> None:
+        self.players_by_slot = players_by_slot
+        self.slot_games = slot_games
+        self.cache.clear()
+
+    def render(self, parts: list[dict[str, any]]) -> str:
+        key: tuple = tuple((part.get('type', 'text'), part.get('text', ''), part.get('player', -1)) for part in parts)
+        message: str | None = self.cache.get(key)
+        if message is not None:
+            self.cache.move_to_end(key)
+            return message
+
+        message = ''.join([self.__render_part(part) for part in parts])
+        self.cache[key] = message
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return message
+
+    def __render_part(self, part: dict[str, any]) -> str:
+        text: str = part.get('text', '')
+        match part.get('type', 'text'):
+            case 'player_id':
+                player: APNetworkPlayer | None = self.players_by_slot.get(int(text))
+                return player.name if player is not None else f'Unknown Player {text}'
+            case 'item_id' if self.datapackage is not None:
+                game: str = self.slot_games.get(part.get('player', -1), '')
+                return self.datapackage.item_name(game, int(text), self.checksums.get(game, ''))
+            case 'location_id' if self.datapackage is not None:
+                game: str = self.slot_games.get(part.get('player', -1), '')
+                return self.datapackage.location_name(game, int(text), self.checksums.get(game, ''))
+            case _:
+                return text
 
 class IncPrintJSON(APPacket):
-    def __init__(self, data: dict, network_players: list[APNetworkPlayer] = [], network_items: list[APNetworkItem] = [], packet_direction: str = PacketDirection.Incoming):
-        super().__init__(data['cmd'], packet_direction)
-        self.data: list[dict[str, any]] = data['data']
-        self.type: str = data['type']
-        
+    __slots__ = ('parts', 'type', 'output_messages', 'team', 'slot', 'tags', 'message')
+
+    def __init__(self, data: dict, renderer: PrintJSONRenderer | None = None, packet_direction: str = PacketDirection.Incoming):
+        super().__init__(data['cmd'], packet_direction, data)
+        self.parts: list[dict[str, any]] = data['data']
+        self.type: str | None = data.get('type')
+
         self.output_messages: list[str] = []
 
         match self.type:
-            case PrintJSONMessageTypes.Join:
+            case PrintJSONMessageTypes.Join | PrintJSONMessageTypes.Part | PrintJSONMessageTypes.TagsChanged:
+                self.team: int = data['team']
+                self.slot: int = data['slot']
+                self.tags: list[str] = data.get('tags', [])
+            case PrintJSONMessageTypes.Chat:
                 self.team: int = data['team']
                 self.slot: int = data['slot']
-                self.tags: list[str] = data['tags']
-            case PrintJSONMessageTypes.Tutorial:
+                self.message: str = data['message']
+            case None:
                 pass
-            case PrintJSONMessageTypes.Hint:
-                combined_string: str = ''
-                for line in self.data:
-                    if 'player_id' in line.values():
-                        player_id = int(line['text'])
-                        for player in network_players:
-                            if player.slot == player_id:
-                                player_name = player.name
-                        line['text'] = player_name
-                    '''elif 'location_id' in line.values():
-                        location_id = int(line['text'])
-                        for item in network_items:
-                            if item.location_id == location_id:
-                                location_id = item.name                 # item.name doesn't exist. Where do we get the item's name?
-                    combined_string += line['text']
-                    '''
-                    combined_string += line['text']
-                self.data = [{'text': combined_string}]
-            case _:
+            case _ if self.type not in PrintJSONMessageTypes.__members__:
                 print(f'Unknown PrintJSON type: {self.type}')
 
-        self.__process_output_messages()
-
-    def __process_output_messages(self) -> None:
-        for msg in self.data:
-            msg: str = msg['text']
-            self.output_messages.append(msg)
+        if renderer is None:
+            renderer = PrintJSONRenderer()
+        self.output_messages.append(renderer.render(self.parts))
 
 class OutLocationChecks(APPacket):
+    __slots__ = ('locations',)
+
     def __init__(self, locations: list[int], packet_direction: str = PacketDirection.Outgoing):
         super().__init__('LocationChecks', packet_direction)
         self.locations: list[int] = locations
@@ -169,6 +316,8 @@ class OutLocationChecks(APPacket):
         }
 
 class OutSetNotify(APPacket):
+    __slots__ = ('keys',)
+
     def __init__(self, keys: list[str], packet_direction: str = PacketDirection.Outgoing):
         super().__init__('SetNotify', packet_direction)
         self.keys: list[str] = keys
@@ -182,6 +331,8 @@ class OutSetNotify(APPacket):
         }
 
 class OutGet(APPacket):
+    __slots__ = ('keys',)
+
     def __init__(self, keys: list[str], packet_direction: str = PacketDirection.Outgoing):
         super().__init__('Get', packet_direction)
         self.keys: list[str] = keys
@@ -195,6 +346,8 @@ class OutGet(APPacket):
         }
 
 class OutLocationScouts(APPacket):
+    __slots__ = ('locations', 'create_as_hint')
+
     def __init__(self, locations: list[int], create_as_hint: int = 0, packet_direction: str = PacketDirection.Outgoing):
         super().__init__('LocationScouts', packet_direction)
         self.locations: list[int] = locations
@@ -209,41 +362,82 @@ class OutLocationScouts(APPacket):
             'create_as_hint': self.create_as_hint
         }
 
+class OutGetDataPackage(APPacket):
+    __slots__ = ('games',)
+
+    def __init__(self, games: list[str], packet_direction: str = PacketDirection.Outgoing):
+        super().__init__('GetDataPackage', packet_direction)
+        self.games: list[str] = games
+
+        self.__create_response()
+
+    def __create_response(self) -> None:
+        self.response: dict[str, any] = {
+            'cmd': self.cmd,
+            'games': self.games
+        }
+
 class IncRetrieved(APPacket):
+    __slots__ = ()
+
+    keys: dict[str, dict[str, any]] = FrameField()
+
     def __init__(self, data: dict, packet_direction: str = PacketDirection.Incoming):
-        super().__init__(data['cmd'], packet_direction)
-        self.keys: dict[str, dict[str, any]] = data['keys']
+        super().__init__(data['cmd'], packet_direction, data)
+
+class IncSetReply(APPacket):
+    __slots__ = ()
+
+    key: str = FrameField()
+    value: any = FrameField()
+    original_value: any = FrameField(default=None)
+
+    def __init__(self, data: dict, packet_direction: str = PacketDirection.Incoming):
+        super().__init__(data['cmd'], packet_direction, data)
 
 class IncLocationInfo(APPacket):
+    __slots__ = ()
+
     def __init__(self, data: dict, packet_direction: str = PacketDirection.Incoming):
-        super().__init__(data['cmd'], packet_direction)
-        self.network_items: list[APNetworkItem] = []
-        for loc in data['locations']:
+        super().__init__(data['cmd'], packet_direction, data)
+
+    @property
+    def network_items(self) -> Iterator[APNetworkItem]:
+        # Generated on demand so a big frame never holds a second full copy of its locations
+        for loc in self.data['locations']:
             if loc['class'] == 'NetworkItem':
-                new_loc: APNetworkItem = APNetworkItem(loc['item'], loc['location'], loc['player'], loc['flags'], True)
-                self.network_items.append(new_loc)
+                yield APNetworkItem(loc['item'], loc['location'], loc['player'], loc['flags'], True)
 
 class IncBounced(APPacket):
+    __slots__ = ()
+
+    slots: list[int] = FrameField(default=[])
+
     def __init__(self, data: dict, packet_direction: str = PacketDirection.Incoming):
-        super().__init__(data['cmd'], packet_direction)
-        self.slots: list[int] = data['slots']
+        super().__init__(data['cmd'], packet_direction, data)
+
+class IncDataPackage(APPacket):
+    __slots__ = ()
+
+    def __init__(self, data: dict, packet_direction: str = PacketDirection.Incoming):
+        super().__init__(data['cmd'], packet_direction, data)
+
+    @property
+    def games(self) -> dict[str, dict[str, any]]:
+        return self.data['data']['games']
 
 class IncRoomUpdate(APPacket):
+    __slots__ = ()
+
+    checked_locations: list[int] | None = FrameField(default=None)
+    hint_points: int | None = FrameField(default=None)
+
     def __init__(self, data: dict, packet_direction: str = PacketDirection.Incoming):
-        super().__init__(data['cmd'], packet_direction)
-        self.checked_locations: list[int] | None = None
-        for key in data.keys():
-            match key:
-                case 'hint_points':
-                    self.hint_points: int = data['hint_points']
-                case 'checked_locations':
-                    self.checked_locations = data['checked_locations']
-                case _:
-                    pass
+        super().__init__(data['cmd'], packet_direction, data)
 
 '''
 {
     "cmd": "RoomUpdate",
     "hint_points": 17
 }
-'''
\ No newline at end of file
+'''
@@ -1,10 +1,22 @@
-from websockets.sync.client import connect
-from enum import Enum, auto
+from websockets.asyncio.client import connect, ClientConnection
+from websockets.exceptions import ConnectionClosed, InvalidHandshake
+from enum import Enum, IntEnum, auto
+from collections import deque
+from typing import Callable
 from ap_packets import *
-from nothing import *
+from nothing import NothingHintGame, TimerWorker, TimerEvent, TimerEventType
+from hint_index import HintCandidates
+from item_store import ItemStore
+from datapackage import DataPackageCache, DEFAULT_CACHE_DIR
+from scout_cache import ScoutCache
+from handler_registry import HandlerRegistry
+from data_storage import DataStorage
+from recorder import FrameRecorder, FrameDirection
+from hint_ledger import HintLedger, get_ledger_path
+from metrics import Metrics, MetricsServer, Sample, SIZE_BUCKETS, dump_periodically, frame_size
+import asyncio
 import random
-import json
-import sys
+import time
 
 class APStatus(Enum):
     DISCONNECTED = auto()      # Not connected to any Archipelago server
@@ -14,8 +26,52 @@ class APStatus(Enum):
     PLAYING = auto()           # Authenticated and actively playing
     DISCONNECTING = auto()     # Attempting to disconnect from the server
 
+class APConnectionRefused(Exception):
+    # The server turned the slot down, retrying won't help
+    pass
+
+class RequestPriority(IntEnum):
+    HIGH = 0   # Sent ahead of anything else pending, e.g. hint scouts
+    NORMAL = 1
+
+class SendQueue:
+    def __init__(self, max_batch_size: int = 64, flush_interval: float = 0.01) -> None:
+        self.max_batch_size: int = max_batch_size
+        self.flush_interval: float = flush_interval # Seconds to wait for more requests before sending a frame
+
+        self.queues: list[deque[dict[str, any]]] = [deque() for _ in RequestPriority]
+        self.pending: asyncio.Event = asyncio.Event()
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self.queues)
+
+    def put(self, req: dict[str, any], priority: RequestPriority = RequestPriority.NORMAL) -> None:
+        self.queues[priority].append(req)
+        self.pending.set()
+
+    def clear(self) -> list[dict[str, any]]:
+        dropped: list[dict[str, any]] = [req for queue in self.queues for req in queue]
+        for queue in self.queues:
+            queue.clear()
+        self.pending.clear()
+        return dropped
+
+    async def get_batch(self) -> list[dict[str, any]]:
+        await self.pending.wait()
+        if self.flush_interval > 0:
+            await asyncio.sleep(self.flush_interval)
+
+        batch: list[dict[str, any]] = []
+        for queue in self.queues:
+            while queue and len(batch) < self.max_batch_size:
+                batch.append(queue.popleft())
+
+        if len(self) == 0:
+            self.pending.clear()
+        return batch
+
 class Archipelago:
-    def __init__(self, port: str, slot_name: str, ip: str = 'archipelago.gg', password: str = '', wss: bool = True) -> None:
+    def __init__(self, port: str, slot_name: str, ip: str = 'archipelago.gg', password: str = '', wss: bool = True, max_batch_size: int = 64, flush_interval: float = 0.01, datapackage: DataPackageCache | None = None, cache_dir: str = DEFAULT_CACHE_DIR, reconnect_delay: float = 1.0, max_reconnect_delay: float = 60.0, scout_chunk_size: int = 500, codec: JSONCodec | None = None, record_path: str = '', metrics: Metrics | None = None, ledger_path: str = '') -> None:
         self.ip = ip
         self.port = port
         self.slot_name = slot_name
@@ -34,161 +90,415 @@ class Archipelago:
 
         self.client_name_tag: str = "APNothing"
 
-        self.queued_requests: list = []
+        self.created_at: float = time.monotonic()
+        self.time_to_connected: float | None = None # Seconds from creation to the first Connected, for startup measurements
+
+        self.cache_dir: str = cache_dir
+        self.reconnect_delay: float = reconnect_delay
+        self.max_reconnect_delay: float = max_reconnect_delay
+        self.reconnect_attempt: int = 0
+        self.stopping: bool = False
+
+        self.client: ClientConnection | None = None
+        self.codec: JSONCodec = codec if codec is not None else get_codec()
+        self.handlers: HandlerRegistry = HandlerRegistry()
+        self.recorder: FrameRecorder | None = FrameRecorder(record_path) if record_path else None
+        self.register_handlers()
+        self.queued_requests: SendQueue = SendQueue(max_batch_size, flush_interval)
         
-        self.remote_keys: dict[str, any] = {}
-        self.network_items: list[APNetworkItem] = []
+        self.remote_keys: DataStorage = DataStorage()
+        self.watched_keys: list[str] = [] # Extra keys tracked on every connection
+        self.network_items: ItemStore = ItemStore()
+        self.seed_name: str = ''
+        self.scout_cache: ScoutCache | None = None
+        self.scout_chunk_size: int = scout_chunk_size
+        self.pending_scouts: deque[list[int]] = deque() # Chunks of locations still to scout, one is in flight at a time
+        self.scout_in_flight: set[int] = set() # Locations of the chunk waiting for its LocationInfo
 
         self.players: list[APNetworkPlayer] = []
+        self.players_by_slot: dict[int, APNetworkPlayer] = {}
+        self.slot_games: dict[int, str] = {}
+
+        self.datapackage: DataPackageCache = datapackage if datapackage is not None else DataPackageCache(cache_dir)
+        self.datapackage_checksums: dict[str, str] = {} # This room's, the cache may be shared with other rooms
+        self.renderer: PrintJSONRenderer = PrintJSONRenderer(datapackage=self.datapackage, checksums=self.datapackage_checksums)
 
         self.team_id: int = -1
         self.slot_id: int = -1
 
-        self.checked_locations: list[int] = []
-        self.missing_locations: list[int] = []
+        self.checked_locations: set[int] = set()
+        self.missing_locations: set[int] = set()
+        self.hint_candidates: HintCandidates = HintCandidates()
+
+        # Hints earned and redeemed, on disk when given a path so they survive crashes
+        self.ledger: HintLedger = HintLedger(ledger_path or None)
+        if self.ledger.pending > 0:
+            print(f'{self.ledger.pending} hints from an earlier session still to give')
+        if self.ledger.unconfirmed:
+            unconfirmed: list[int] = sorted(location_id for locations in self.ledger.unconfirmed.values() for location_id in locations)
+            print(f'Unanswered hint scouts from an earlier session: {len(self.ledger.unconfirmed)}, sending them again for locations {", ".join(map(str, unconfirmed))}')
 
-        self.hints_to_give: int = 0
+        self.metrics: Metrics = metrics if metrics is not None else Metrics()
+        self.metrics.add_collector(self.collect_metrics)
+
+    @property
+    def hints_to_give(self) -> int:
+        return self.ledger.pending
 
     def get_url(self) -> str:
         return f'{"wss" if self.wss else "ws"}://{self.ip}:{self.port}'
     
-    def connect(self) -> None:
-        self.status = APStatus.CONNECTING
+    async def connect(self) -> None:
+        self.status = APStatus.SOCKET_CONNECTING
 
         url: str = self.get_url()
-        self.client = connect(url)
-        
-        data: list = self.__receive_data(1)
-        self.process_data(data)
+        # DataPackages and big LocationInfo frames easily go over the default 1 MiB limit
+        self.client = await connect(url, max_size=None)
+
+        self.status = APStatus.CONNECTING
 
-    def __send_data(self, data: dict | list[dict]) -> None:
+    async def __send_data(self, data: dict | list[dict]) -> None:
         if not isinstance(data, list):
             data = [data]
-        message: str = json.dumps(data)
-        self.client.send(message)   
+        message: str = self.codec.dumps(data)
+        if self.recorder is not None:
+            self.recorder.record(FrameDirection.OUTGOING, message)
+        start: float = time.perf_counter()
+        await self.client.send(message)
+        self.metrics.observe('send_seconds', time.perf_counter() - start)
+        self.metrics.observe('frame_bytes', frame_size(message), SIZE_BUCKETS, direction='out')
+        for req in data:
+            self.metrics.inc('outgoing_commands_total', cmd=req['cmd'])
+
+    async def __reader(self) -> None:
+        # Wakes only when the server pushes a frame, no polling
+        async for message in self.client:
+            if self.recorder is not None:
+                self.recorder.record(FrameDirection.INCOMING, message)
+            # Time from having the message to being done with it, decoding included
+            start: float = time.perf_counter()
+            data: list = self.codec.loads(message)
+            self.process_data(data)
+            self.metrics.observe('receive_seconds', time.perf_counter() - start)
+            self.metrics.observe('frame_bytes', frame_size(message), SIZE_BUCKETS, direction='in')
+
+    async def __writer(self) -> None:
+        while True:
+            # Everything pending goes out as one frame, the protocol accepts a list of commands
+            batch: list[dict[str, any]] = await self.queued_requests.get_batch()
+            # Hint redemptions in the batch have to be on disk before the server sees them
+            await self.ledger.commit()
+            await self.__send_data(batch)
+
+    def queue_request(self, req: dict[str, any], priority: RequestPriority = RequestPriority.NORMAL) -> None:
+        self.queued_requests.put(req, priority)
+
+    def register_handlers(self) -> None:
+        self.handlers.register(IncAPCommands.RoomInfo, self.on_room_info, IncRoomInfo)
+        self.handlers.register(IncAPCommands.ConnectionRefused, self.on_connection_refused, IncConnectionRefused)
+        self.handlers.register(IncAPCommands.Connected, self.on_connected, IncConnected)
+        self.handlers.register(IncAPCommands.PrintJSON, self.on_print_json, lambda frame: IncPrintJSON(frame, self.renderer))
+        self.handlers.register(IncAPCommands.Retrieved, self.on_retrieved, IncRetrieved)
+        self.handlers.register(IncAPCommands.SetReply, self.on_set_reply, IncSetReply)
+        self.handlers.register(IncAPCommands.LocationInfo, self.on_location_info, IncLocationInfo)
+        self.handlers.register(IncAPCommands.DataPackage, self.on_data_package, IncDataPackage)
+        self.handlers.register(IncAPCommands.RoomUpdate, self.on_room_update, IncRoomUpdate)
+        self.handlers.register(IncAPCommands.InvalidPacket, self.on_invalid_packet)
+        # Nothing to do for these yet, so skip building their packets
+        self.handlers.ignore(IncAPCommands.Bounced)
+        self.handlers.ignore(IncAPCommands.ReceivedItems)
+        self.handlers.unhandled = self.on_unknown
 
-    def __receive_data(self, timeout: int = 0) -> list:
-        try:
-            message: str = self.client.recv(timeout=timeout)
-            data: list = json.loads(message)
-        except TimeoutError as e:
-            data = []
-        return data
-    
     def process_data(self, data: list) -> None:
         for frame in data:
-            # print(f'- {frame['cmd']}') - For debugging
-            match frame['cmd']:
-                case IncAPCommands.RoomInfo:
-                    cmd = IncRoomInfo(frame, PacketDirection.Incoming)
-                    cmd.create_response(self.slot_name, self.password, self.uuid, self.ap_version, self.client_name_tag)
-                    self.queued_requests.append(cmd.response)
-                case IncAPCommands.ConnectionRefused:
-                    cmd = IncConnectionRefused(frame, PacketDirection.Incoming)
-                    for error_msg in cmd.error_messages:
-                        print(error_msg)
-                        sys.exit(1)
-                case IncAPCommands.Connected:
-                    cmd = IncConnected(frame, PacketDirection.Incoming)
-                    self.status = APStatus.CONNECTED
-
-                    self.team_id = cmd.team
-                    self.slot_id = cmd.slot
-
-                    self.checked_locations = cmd.checked_locations
-                    self.missing_locations = cmd.missing_locations
-
-                    self.players = cmd.players
-                    
-                    # Send some packets at start of connection
-                    packets_to_send: list[APPacket] = []
-                    
-                    packet = OutLocationChecks(locations=cmd.checked_locations)
-                    packets_to_send.append(packet)
-
-                    packet = OutSetNotify(keys=[f'_read_hints_{self.team_id}_{self.slot_id}'])
-                    packets_to_send.append(packet)
-
-                    packet = OutGet(keys=[f'_read_hints_{self.team_id}_{self.slot_id}'])
-                    packets_to_send.append(packet)
-
-                    packet = OutSetNotify(keys=[f'APNothing_Settings'])
-                    packets_to_send.append(packet)
-
-                    packet = OutGet(keys=[f'APNothing_Settings'])
-                    packets_to_send.append(packet)
-
-                    packet = OutLocationScouts(locations=cmd.checked_locations+cmd.missing_locations)
-                    packets_to_send.append(packet)
-
-                    for packet in packets_to_send:
-                        self.queued_requests.append(packet.response)
-                case IncAPCommands.PrintJSON:
-                    cmd = IncPrintJSON(frame, self.players, self.network_items, PacketDirection.Incoming)
-                    messages: list[str] = cmd.output_messages
-                    for message in messages:
-                        print(message)
-                case IncAPCommands.Retrieved:
-                    cmd = IncRetrieved(frame, PacketDirection.Incoming)
-                    for key, value in cmd.keys.items():
-                        self.remote_keys[key] = value
-                case IncAPCommands.LocationInfo:
-                    cmd = IncLocationInfo(frame, PacketDirection.Incoming)
-                    for network_item in cmd.network_items:
-                        self.network_items.append(network_item)
-                case IncAPCommands.Bounced:
-                    cmd = IncBounced(frame, PacketDirection.Incoming)
-                    # What do we want to do when bounced?
-                case IncAPCommands.RoomUpdate:
-                    cmd = IncRoomUpdate(frame, PacketDirection.Incoming)
-                    if cmd.checked_locations:
-                        self.checked_locations = cmd.checked_locations
-                case _ as cmd_name:
-                    print(f'- Unknown Command Received: {cmd_name}')
+            self.handlers.dispatch(frame)
+
+    def on_room_info(self, cmd: IncRoomInfo) -> None:
+        if cmd.seed_name != self.seed_name:
+            # Scouted state from a different seed is useless
+            self.seed_name = cmd.seed_name
+            self.network_items = ItemStore()
+            self.hint_candidates = HintCandidates()
+        self.ledger.set_seed(cmd.seed_name)
+        self.hint_candidates.mark_hinted(self.ledger.hinted)
+        # Only fetch games whose DataPackage checksum isn't cached yet
+        self.datapackage_checksums.clear()
+        self.datapackage_checksums.update(cmd.datapackage_checksums)
+        missing_games: list[str] = self.datapackage.load(cmd.games, cmd.datapackage_checksums)
+        if missing_games:
+            self.queue_request(OutGetDataPackage(missing_games).response)
+
+        cmd.create_response(self.slot_name, self.password, self.uuid, self.ap_version, self.client_name_tag)
+        self.queue_request(cmd.response)
+
+    def on_connection_refused(self, cmd: IncConnectionRefused) -> None:
+        for error_msg in cmd.error_messages:
+            print(error_msg)
+        # Only this session stops, others sharing the event loop keep going
+        self.stopping = True
+        raise APConnectionRefused(f'{self.slot_name} was refused: {", ".join(cmd.errors)}')
+
+    def on_connected(self, cmd: IncConnected) -> None:
+        self.status = APStatus.CONNECTED
+        if self.time_to_connected is None:
+            self.time_to_connected = time.monotonic() - self.created_at
+            print(f'Connected as {self.slot_name} after {self.time_to_connected:.2f}s')
+
+        self.team_id = cmd.team
+        self.slot_id = cmd.slot
+
+        self.checked_locations = set(cmd.checked_locations)
+        self.missing_locations = set(cmd.missing_locations)
+        self.hint_candidates.set_missing(self.missing_locations)
+
+        self.players = cmd.players
+        self.players_by_slot = {player.slot: player for player in cmd.players if player.team == self.team_id}
+        self.slot_games = {int(slot): info['game'] for slot, info in cmd.slot_info.items()}
+        self.renderer.set_players(self.players_by_slot, self.slot_games)
+
+        self.reconnect_attempt = 0
+
+        # Anything scouted in an earlier session for this seed doesn't need to be downloaded again
+        self.scout_cache = ScoutCache(self.seed_name, self.team_id, self.slot_id, self.cache_dir)
+        if len(self.network_items) == 0:
+            for network_item in self.network_items.upsert_many(self.scout_cache.load()):
+                self.hint_candidates.add_item(network_item, self.slot_id)
+
+        self.track_keys([f'_read_hints_{self.team_id}_{self.slot_id}', 'APNothing_Settings'] + self.watched_keys)
+
+        # Only missing locations can ever be hinted
+        unscouted_locations: list[int] = [location_id for location_id in cmd.missing_locations if location_id not in self.network_items]
+        self.pending_scouts = deque(unscouted_locations[i:i + self.scout_chunk_size] for i in range(0, len(unscouted_locations), self.scout_chunk_size))
+        # Scouting starts over on every connection, a chunk in flight on an earlier one will never be answered
+        self.scout_in_flight.clear()
+        self.scout_next_chunk()
+
+        # Hints redeemed before a crash or disconnect but never answered go out again, as the same locations
+        for locations in self.ledger.unconfirmed.values():
+            self.queue_request(OutLocationScouts(sorted(locations), 1).response, RequestPriority.HIGH)
+        self.hint_item()
+
+    def on_print_json(self, cmd: IncPrintJSON) -> None:
+        messages: list[str] = cmd.output_messages
+        for message in messages:
+            print(message)
+
+    def on_retrieved(self, cmd: IncRetrieved) -> None:
+        self.remote_keys.apply_retrieved(cmd.keys)
+
+    def on_set_reply(self, cmd: IncSetReply) -> None:
+        self.remote_keys.apply_set_reply(cmd.key, cmd.value, cmd.original_value)
+
+    def track_keys(self, keys: list[str]) -> None:
+        # Keys already tracked on this connection are kept current by SetReply, so they're never fetched again
+        new_keys: list[str] = self.remote_keys.track(keys)
+        if new_keys:
+            self.queue_request(OutSetNotify(keys=new_keys).response)
+            self.queue_request(OutGet(keys=new_keys).response)
+
+    def watch_key(self, key: str, callback: Callable[[str, any, any], None]) -> None:
+        self.remote_keys.watch(key, callback)
+        if key not in self.watched_keys:
+            self.watched_keys.append(key)
+        if self.status in [APStatus.CONNECTED, APStatus.PLAYING]:
+            self.track_keys([key])
+
+    def on_location_info(self, cmd: IncLocationInfo) -> None:
+        # network_items builds its items on every iteration, so they're built once here and shared
+        items: list[APNetworkItem] = list(cmd.network_items)
+        new_items: list[APNetworkItem] = self.network_items.upsert_many(items)
+        answered: list[int] = [network_item.location_id for network_item in items]
+        for network_item in items:
+            # Hinted locations are skipped, the answer to a hint scout doesn't make its location a candidate again
+            self.hint_candidates.add_item(network_item, self.slot_id)
+        if self.ledger.unconfirmed:
+            self.ledger.acknowledge(answered)
+        if self.scout_cache is not None:
+            self.scout_cache.append(new_items)
+        # The server answers a scout in one LocationInfo, other answers (e.g. to hint scouts) leave the chunk in flight
+        if self.scout_in_flight and not self.scout_in_flight.isdisjoint(answered):
+            self.scout_in_flight.clear()
+            self.scout_next_chunk()
+        self.hint_item()
+
+    def on_data_package(self, cmd: IncDataPackage) -> None:
+        self.datapackage_checksums.update(self.datapackage.store(cmd.games))
+        self.renderer.cache.clear()
+
+    def on_room_update(self, cmd: IncRoomUpdate) -> None:
+        if cmd.checked_locations:
+            # RoomUpdate only carries the newly checked locations
+            self.checked_locations.update(cmd.checked_locations)
+            self.missing_locations.difference_update(cmd.checked_locations)
+            self.hint_candidates.mark_checked(cmd.checked_locations)
+
+    def on_invalid_packet(self, cmd: APPacket) -> None:
+        print(f'Server rejected a packet: {cmd.data.get("text", cmd.data.get("type", ""))}')
+
+    def on_unknown(self, frame: dict) -> None:
+        print(f'- Unknown Command Received: {frame["cmd"]}')
+
+    def scout_next_chunk(self) -> None:
+        # Chunks are requested one at a time so each LocationInfo lands in the hint index before the next is asked for
+        if self.pending_scouts and not self.scout_in_flight:
+            locations: list[int] = self.pending_scouts.popleft()
+            self.scout_in_flight.update(locations)
+            self.queue_request(OutLocationScouts(locations=locations).response)
+
+    def earn_hints(self, count: int = 1) -> None:
+        self.ledger.earn(count)
+        self.metrics.inc('hints_earned_total', count)
+        self.hint_item()
 
     def hint_item(self) -> None:
         if self.status in [APStatus.CONNECTED, APStatus.PLAYING] and self.hints_to_give > 0:
-            valid_items: list[APNetworkItem] = []
-        
-            for network_item in self.network_items:
-                if network_item.type in [APNetworkItemType.PROGRESSION, APNetworkItemType.USEFUL] and network_item.location_id in self.missing_locations and network_item.player_id == self.slot_id:
-                    valid_items.append(network_item)
-
-            if len(valid_items) == 0:
+            # Every hint waiting to be given goes out in one scout
+            locations: list[int] = []
+            while len(locations) < self.hints_to_give:
+                location_id: int | None = self.hint_candidates.sample()
+                if location_id is None:
+                    break
+                locations.append(location_id)
+                # A location only needs hinting once, this also keeps set_missing from bringing it back on reconnect
+                self.hint_candidates.mark_hinted([location_id])
+            if not locations:
                 return
 
-            item: APNetworkItem = valid_items[random.randint(0, len(valid_items) - 1)]
+            # Logged before it's queued, the writer makes it durable before the scout is sent
+            self.ledger.redeem(locations)
+            req = OutLocationScouts(locations, 1)
+            self.queue_request(req.response, RequestPriority.HIGH)
+            self.metrics.inc('hints_redeemed_total', len(locations))
+
+    def collect_metrics(self) -> list[Sample]:
+        samples: list[Sample] = [
+            ('queued_requests', 'gauge', {}, len(self.queued_requests)),
+            ('hints_to_give', 'gauge', {}, self.hints_to_give),
+            ('unconfirmed_hint_batches', 'gauge', {}, len(self.ledger.unconfirmed)),
+            ('hint_candidates', 'gauge', {}, len(self.hint_candidates)),
+            ('pending_scout_chunks', 'gauge', {}, len(self.pending_scouts)),
+            ('reconnect_attempt', 'gauge', {}, self.reconnect_attempt),
+            ('connected', 'gauge', {}, int(self.status in [APStatus.CONNECTED, APStatus.PLAYING])),
+        ]
+        # Incoming counts and handler time are already kept by the registry
+        for cmd_name, stats in self.handlers.stats.items():
+            samples.append(('incoming_commands_total', 'counter', {'cmd': cmd_name}, stats.count))
+            samples.append(('handler_seconds_total', 'counter', {'cmd': cmd_name}, stats.total_time))
+        for cmd_name, count in self.handlers.ignored_counts.items():
+            samples.append(('incoming_commands_total', 'counter', {'cmd': cmd_name}, count))
+        return samples
 
-            req = OutLocationScouts([item.location_id], 1)
-            self.queued_requests.append(req.response)
+    async def run(self) -> None:
+        while not self.stopping:
+            try:
+                await self.connect()
+                await self.__run_session()
+            except (OSError, ConnectionClosed, InvalidHandshake) as e:
+                print(f'Connection lost: {str(e)}')
+            finally:
+                self.status = APStatus.DISCONNECTED
+                self.__reset_session()
 
-            self.hints_to_give -= 1
+            if self.stopping:
+                break
+            delay: float = self.get_reconnect_delay()
+            self.reconnect_attempt += 1
+            print(f'Reconnecting in {delay:.1f} seconds..')
+            await asyncio.sleep(delay)
 
-    def run(self) -> None:
-        if self.status == APStatus.CONNECTING or self.status == APStatus.CONNECTED or self.status == APStatus.PLAYING:
-            self.hint_item()
+    def get_reconnect_delay(self) -> float:
+        # Exponential backoff with jitter so many clients don't reconnect in lockstep
+        delay: float = min(self.max_reconnect_delay, self.reconnect_delay * 2 ** self.reconnect_attempt)
+        return random.uniform(delay / 2, delay)
 
-            if len(self.queued_requests) > 0:
-                queued_cmds: list[str] = []
-                for req in self.queued_requests:
-                    queued_cmds.append(req['cmd'])
-                #print(f'Queued Requests: {queued_cmds}') - For debugging
-                req = self.queued_requests.pop(0)
-                self.__send_data(req)
-            
-            recieved_data = self.__receive_data()
-            if len(recieved_data) > 0:
-                self.process_data(recieved_data)
+    async def __run_session(self) -> None:
+        reader: asyncio.Task = asyncio.create_task(self.__reader())
+        writer: asyncio.Task = asyncio.create_task(self.__writer())
+        try:
+            # The reader finishes when the server closes the socket, the writer only ever fails
+            done, _ = await asyncio.wait([reader, writer], return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        finally:
+            reader.cancel()
+            writer.cancel()
+
+    def __reset_session(self) -> None:
+        self.remote_keys.reset_tracking()
+        # Requests queued for the old socket are meaningless on a new one. Hint scouts among them stay unconfirmed in the ledger and go out again on the next Connected.
+        self.queued_requests.clear()
+        self.scout_in_flight.clear()
 
-async def main(ip: str, port: int, slot_name: str, password: str = '', milestone: int = 300):
+    async def disconnect(self) -> None:
+        self.stopping = True
+        if self.client is not None:
+            self.status = APStatus.DISCONNECTING
+            await self.client.close()
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+        await self.ledger.close()
+        self.status = APStatus.DISCONNECTED
+
+async def redeem_hints(sessions: list[Archipelago], events: asyncio.Queue) -> None:
+    # Every session driven by this timer earns a hint per milestone
+    while True:
+        event: TimerEvent = await events.get()
+        match event.type:
+            case TimerEventType.MILESTONE:
+                for ap in sessions:
+                    if not ap.stopping:
+                        ap.earn_hints()
+            case TimerEventType.STOPPED:
+                return
+
+def add_timer_metrics(metrics: Metrics, nothing: NothingHintGame, **labels: str) -> None:
+    metrics.add_histogram('tick_seconds', nothing.tick_durations, **labels)
+    metrics.add_collector(lambda: [
+        ('timer_reads_total', 'counter', labels, nothing.reads),
+        ('timer_read_rate', 'gauge', labels, nothing.get_read_rate()),
+        ('timer_milestones_total', 'counter', labels, nothing.milestone_count),
+        ('timer_missed_reads_total', 'counter', labels, nothing.missed_reads),
+        # Pointer chain health, from whichever platform backend reads the timer
+        ('timer_re_resolutions_total', 'counter', labels, nothing.helper.re_resolutions),
+        ('timer_read_failures_total', 'counter', labels, nothing.helper.read_failures),
+        ('timer_resolve_failures_total', 'counter', labels, nothing.helper.resolve_failures),
+    ])
+
+async def main(ip: str, port: int, slot_name: str, password: str = '', milestone: int = 300, wss: bool = True, cache_dir: str = DEFAULT_CACHE_DIR, record: str = '', metrics_port: int = 0, metrics_file: str = '', metrics_interval: float = 60.0, started_at: float | None = None):
     if ip == '':
         ip = 'archipelago.gg'
     nothing: NothingHintGame = NothingHintGame(milestone)
-    ap: Archipelago = Archipelago(port, slot_name, ip=ip, password=password)
-    ap.connect()
-    while True:
-        ap.run()
-        nothing.tick()
-        if nothing.hints_to_give > 0:
-            ap.hints_to_give += 1
-            nothing.hints_to_give -= 1
\ No newline at end of file
+    ap: Archipelago = Archipelago(port, slot_name, ip=ip, password=password, wss=wss, cache_dir=cache_dir, record_path=record, ledger_path=get_ledger_path(ip, port, slot_name, cache_dir))
+    if started_at is not None:
+        ap.created_at = started_at
+
+    add_timer_metrics(ap.metrics, nothing)
+    metrics_server: MetricsServer | None = None
+    if metrics_port > 0:
+        metrics_server = MetricsServer(ap.metrics, port=metrics_port)
+        await metrics_server.start()
+    dumper: asyncio.Task | None = asyncio.create_task(dump_periodically(ap.metrics, metrics_file, metrics_interval)) if metrics_file else None
+
+    events: asyncio.Queue[TimerEvent] = asyncio.Queue()
+    worker: TimerWorker = TimerWorker(nothing, asyncio.get_running_loop(), events)
+    worker.start()
+
+    network: asyncio.Task = asyncio.create_task(ap.run())
+    redeemer: asyncio.Task = asyncio.create_task(redeem_hints([ap], events))
+    try:
+        done, _ = await asyncio.wait([network, redeemer], return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+    finally:
+        network.cancel()
+        redeemer.cancel()
+        if dumper is not None:
+            dumper.cancel()
+        if metrics_server is not None:
+            await metrics_server.stop()
+        worker.stop()
+        print(f'Timer reads: {nothing.reads} ({nothing.get_read_rate():.2f}/s)')
+        for cmd_name, stats in ap.handlers.get_stats():
+            print(f'{cmd_name}: {stats.count} frames, {stats.total_time * 1000:.1f}ms total, {stats.max_time * 1000:.1f}ms max')
+        await ap.disconnect()
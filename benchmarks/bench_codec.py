@@ -0,0 +1,64 @@
+# JSON codec backends on realistic frame sizes
+# Run from the repository root: python -m benchmarks.bench_codec
+from ap_packets import CODECS, JSONCodec, IncConnected, IncLocationInfo
+import tracemalloc
+import random
+import json
+import time
+
+def make_connected(players: int, locations: int) -> list[dict]:
+    return [{
+        'cmd': 'Connected', 'team': 0, 'slot': 1, 'hint_points': 0,
+        'players': [{'class': 'NetworkPlayer', 'team': 0, 'slot': slot, 'alias': f'Player{slot}', 'name': f'Player{slot}'} for slot in range(1, players + 1)],
+        'missing_locations': list(range(locations // 2)), 'checked_locations': list(range(locations // 2, locations)),
+        'slot_info': {str(slot): {'class': 'NetworkSlot', 'name': f'Player{slot}', 'game': f'Game{slot % 10}', 'type': 1, 'group_members': []} for slot in range(1, players + 1)},
+        'slot_data': {'option': 1, 'list': list(range(100))},
+    }]
+
+def make_location_info(locations: int) -> list[dict]:
+    return [{'cmd': 'LocationInfo', 'locations': [{'class': 'NetworkItem', 'item': random.randint(1, 1 << 40), 'location': location_id, 'player': random.randint(1, 100), 'flags': random.choice([0, 1, 2, 4])} for location_id in range(locations)]}]
+
+def consume_connected(frame: dict) -> None:
+    packet: IncConnected = IncConnected(frame)
+    packet.missing_locations, packet.checked_locations, packet.players
+
+def consume_location_info(frame: dict) -> None:
+    for _ in IncLocationInfo(frame).network_items:
+        pass
+
+def bench(codec: JSONCodec, message: str, consume, repeat: int) -> tuple[float, float, int]:
+    start: float = time.perf_counter()
+    for _ in range(repeat):
+        codec.loads(message)
+    decode: float = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        consume(codec.loads(message)[0])
+    packet: float = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    consume(codec.loads(message)[0])
+    peak: int = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return decode, packet, peak
+
+if __name__ == '__main__':
+    codecs: list[JSONCodec] = []
+    for codec_type in CODECS.values():
+        try:
+            codecs.append(codec_type())
+        except ImportError:
+            print(f'{codec_type.name} is not installed, skipping')
+    frames = [
+        ('Connected, 100 players, 10k locations', make_connected(100, 10_000), consume_connected, 50),
+        ('LocationInfo, 1k locations', make_location_info(1_000), consume_location_info, 50),
+        ('LocationInfo, 10k locations', make_location_info(10_000), consume_location_info, 10),
+        ('LocationInfo, 100k locations', make_location_info(100_000), consume_location_info, 3),
+    ]
+    for name, frame, consume, repeat in frames:
+        message: str = json.dumps(frame)
+        print(f'{name} ({len(message) / 1024:.0f} KiB):')
+        for codec in codecs:
+            decode, packet, peak = bench(codec, message, consume, repeat)
+            print(f'  {codec.name:<8} decode {decode * 1e3:>8.2f} ms   decode+packet {packet * 1e3:>8.2f} ms   peak {peak / 1024:>8.0f} KiB')
@@ -0,0 +1,71 @@
+# End-to-end client benchmarks against the mock server, no network or game needed
+# Run from the repository root: python -m benchmarks.bench_e2e [--locations 100 1000 10000 100000] [--players 10]
+from archipelago import Archipelago, APStatus
+import contextlib
+import subprocess
+import tempfile
+import argparse
+import resource
+import asyncio
+import time
+import sys
+import os
+
+async def wait_for(condition, timeout: float = 120.0, interval: float = 0.001) -> float:
+    start: float = time.perf_counter()
+    while not condition():
+        if time.perf_counter() - start > timeout:
+            raise TimeoutError('Condition not reached')
+        await asyncio.sleep(interval)
+    return time.perf_counter() - start
+
+async def bench(locations: int, players: int, flood_frames: int, idle_seconds: float) -> None:
+    server = subprocess.Popen([sys.executable, '-m', 'benchmarks.mock_server', '--locations', str(locations), '--players', str(players)], stdout=subprocess.PIPE, text=True)
+    try:
+        port: int = int(server.stdout.readline())
+        with tempfile.TemporaryDirectory() as cache_dir, open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            ap: Archipelago = Archipelago(port, 'Player1', ip='127.0.0.1', wss=False, cache_dir=cache_dir)
+            ap.earn_hints()
+
+            start: float = time.perf_counter()
+            network: asyncio.Task = asyncio.create_task(ap.run())
+            connected: float = await wait_for(lambda: ap.status == APStatus.CONNECTED)
+            first_hint: float = await wait_for(lambda: ap.hints_to_give == 0 and len(ap.queued_requests) == 0)
+            scouted: float = await wait_for(lambda: len(ap.pending_scouts) == 0 and len(ap.network_items) >= len(ap.missing_locations))
+
+            # Busy room, time how fast the client gets through the server's broadcast traffic
+            before: int = sum(stats.count for stats in ap.handlers.stats.values())
+            ap.queue_request({'cmd': 'Say', 'text': f'!flood {flood_frames}'})
+            flood_start: float = time.perf_counter()
+            await wait_for(lambda: sum(stats.count for stats in ap.handlers.stats.values()) - before >= flood_frames)
+            flood_time: float = time.perf_counter() - flood_start
+
+            cpu_before: float = time.process_time()
+            await asyncio.sleep(idle_seconds)
+            idle_cpu: float = (time.process_time() - cpu_before) / idle_seconds
+
+            await ap.disconnect()
+            network.cancel()
+        peak_rss: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss # KiB on Linux
+
+        print(f'{locations} locations, {players} players:')
+        print(f'  connect {connected * 1000:.1f} ms, first hint {(connected + first_hint) * 1000:.1f} ms, fully scouted {(connected + first_hint + scouted) * 1000:.1f} ms (total {(time.perf_counter() - start):.2f}s)')
+        print(f'  {flood_frames / flood_time:,.0f} frames/s processed during flood')
+        print(f'  idle CPU {idle_cpu * 100:.2f}%, peak RSS {peak_rss / 1024:.1f} MiB')
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='End-to-end client benchmarks against the mock server')
+    parser.add_argument('--locations', type=int, nargs='+', default=[100, 1000, 10_000, 100_000])
+    parser.add_argument('--players', type=int, default=10)
+    parser.add_argument('--flood', type=int, default=20_000, help='Frames broadcast by the server for the throughput test')
+    parser.add_argument('--idle', type=float, default=2.0, help='Seconds to measure idle CPU over')
+    args = parser.parse_args()
+    for locations in args.locations:
+        # Peak RSS is per process, so every size runs on its own
+        if len(args.locations) > 1:
+            subprocess.run([sys.executable, '-m', 'benchmarks.bench_e2e', '--locations', str(locations), '--players', str(args.players), '--flood', str(args.flood), '--idle', str(args.idle)], check=True)
+        else:
+            asyncio.run(bench(locations, args.players, args.flood, args.idle))
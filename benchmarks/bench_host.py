@@ -0,0 +1,58 @@
+# Cost of hosting N slots in one process against the mock server, compared with N separate processes
+# Run from the repository root: python -m benchmarks.bench_host [--slots 1 2 4 8 16] [--locations 10000]
+from archipelago import Archipelago, APStatus
+from datapackage import DataPackageCache
+from ap_packets import get_codec
+from benchmarks.bench_e2e import wait_for
+import contextlib
+import subprocess
+import tempfile
+import argparse
+import resource
+import asyncio
+import time
+import sys
+import os
+
+async def bench(slots: int, locations: int, players: int, idle_seconds: float) -> None:
+    server = subprocess.Popen([sys.executable, '-m', 'benchmarks.mock_server', '--locations', str(locations), '--players', str(players)], stdout=subprocess.PIPE, text=True)
+    try:
+        port: int = int(server.stdout.readline())
+        with tempfile.TemporaryDirectory() as cache_dir, open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            # Shared the same way host.py shares them
+            datapackage: DataPackageCache = DataPackageCache(cache_dir)
+            codec = get_codec()
+            sessions: list[Archipelago] = [Archipelago(port, f'Player{slot}', ip='127.0.0.1', wss=False, datapackage=datapackage, cache_dir=cache_dir, codec=codec) for slot in range(1, slots + 1)]
+
+            cpu_start: float = time.process_time()
+            networks: list[asyncio.Task] = [asyncio.create_task(ap.run()) for ap in sessions]
+            scouted: float = await wait_for(lambda: all(ap.status == APStatus.CONNECTED and len(ap.pending_scouts) == 0 and len(ap.network_items) >= len(ap.missing_locations) for ap in sessions))
+            startup_cpu: float = time.process_time() - cpu_start
+
+            cpu_before: float = time.process_time()
+            await asyncio.sleep(idle_seconds)
+            idle_cpu: float = (time.process_time() - cpu_before) / idle_seconds
+
+            await asyncio.gather(*(ap.disconnect() for ap in sessions))
+            for network in networks:
+                network.cancel()
+        peak_rss: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss # KiB on Linux
+
+        print(f'{slots} slots: all scouted in {scouted * 1000:.0f} ms, startup CPU {startup_cpu * 1000:.0f} ms, idle CPU {idle_cpu * 100:.2f}%, peak RSS {peak_rss / 1024:.1f} MiB ({peak_rss / 1024 / slots:.1f} MiB per slot)')
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Multi-slot hosting benchmark against the mock server')
+    parser.add_argument('--slots', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--locations', type=int, default=10_000)
+    parser.add_argument('--players', type=int, default=10)
+    parser.add_argument('--idle', type=float, default=2.0, help='Seconds to measure idle CPU over')
+    args = parser.parse_args()
+    for slots in args.slots:
+        # Peak RSS is per process, so every count runs on its own. The 1 slot run is what each separate process would cost.
+        if len(args.slots) > 1:
+            subprocess.run([sys.executable, '-m', 'benchmarks.bench_host', '--slots', str(slots), '--locations', str(args.locations), '--players', str(args.players), '--idle', str(args.idle)], check=True)
+        else:
+            asyncio.run(bench(slots, args.locations, args.players, args.idle))
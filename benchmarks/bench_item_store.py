@@ -0,0 +1,55 @@
+# Memory overhead of scouted item storage
+# Run from the repository root: python -m benchmarks.bench_item_store
+from ap_packets import APNetworkItem
+from item_store import ItemStore
+import tracemalloc
+import random
+
+def make_items(count: int) -> list[tuple[int, int, int, int]]:
+    return [(random.randint(1, 1 << 40), location_id, random.randint(1, 100), random.choice([0, 1, 2, 4])) for location_id in range(count)]
+
+def measure(fn, rows: list[tuple[int, int, int, int]]) -> int:
+    tracemalloc.start()
+    before: int = tracemalloc.get_traced_memory()[0]
+    store = fn(rows)
+    after: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del store
+    return after - before
+
+class DictNetworkItem:
+    # APNetworkItem as it was before __slots__, for comparison
+    def __init__(self, item_id: int, location_id: int, player_id: int, flags: int, player_is_receiving: bool = False):
+        self.item_id = item_id
+        self.location_id = location_id
+        self.player_id = player_id
+        self.player_is_receiving = player_is_receiving
+        self.type = flags
+
+def build_dict_list_rescouted(rows: list[tuple[int, int, int, int]]) -> list[DictNetworkItem]:
+    # The old network_items list appended every LocationInfo, so each rescout added a copy
+    return [DictNetworkItem(*row, True) for _ in range(2) for row in rows]
+
+def build_list(rows: list[tuple[int, int, int, int]]) -> list[APNetworkItem]:
+    return [APNetworkItem(*row, True) for row in rows]
+
+def build_store(rows: list[tuple[int, int, int, int]]) -> ItemStore:
+    store: ItemStore = ItemStore()
+    for row in rows:
+        store.upsert(APNetworkItem(*row, True))
+    return store
+
+def build_store_rescouted(rows: list[tuple[int, int, int, int]]) -> ItemStore:
+    # Every location scouted twice, as happens with hints and reconnects
+    store: ItemStore = build_store(rows)
+    for row in rows:
+        store.upsert(APNetworkItem(*row, True))
+    return store
+
+if __name__ == '__main__':
+    for count in [10_000, 100_000]:
+        rows = make_items(count)
+        print(f'{count} scouted locations:')
+        for name, fn in [('old list (scouted twice)', build_dict_list_rescouted), ('list[APNetworkItem]', build_list), ('ItemStore', build_store), ('ItemStore (scouted twice)', build_store_rescouted)]:
+            size: int = measure(fn, rows)
+            print(f'  {name:<28} {size / 1024:>10.1f} KiB  {size / count:>7.1f} B/item')
@@ -0,0 +1,44 @@
+# Per-read latency of the Linux backend against a stand-in process
+# Run from the repository root: python -m benchmarks.bench_linux_memory
+from nothing_linux import LinuxHelper, ProcessMemory
+import subprocess
+import time
+import sys
+
+READS: int = 100_000
+
+def bench(name: str, fn, reads: int = READS) -> None:
+    start: float = time.perf_counter()
+    for _ in range(reads):
+        fn()
+    elapsed: float = time.perf_counter() - start
+    print(f'  {name:<44} {elapsed / reads * 1e6:>7.2f} us/read')
+
+if __name__ == '__main__':
+    standin = subprocess.Popen([sys.executable, '-m', 'benchmarks.standin_process'], stdout=subprocess.PIPE, text=True)
+    try:
+        pid: int = int(standin.stdout.readline())
+        helper: LinuxHelper = LinuxHelper(pid=pid)
+        print(f'Stand-in process {pid}, timer at {helper.memory_address:#x} reads {helper.read_current_timer():.2f}')
+
+        requests: list[tuple[int, int]] = [(helper.root_address, 8), (helper.memory_address, 4)]
+        # Each path forced, so all three rows time the same ProcessMemory.read of the same addresses
+        batched: ProcessMemory = ProcessMemory(pid, pread_max_requests=0)
+        proc_mem: ProcessMemory = ProcessMemory(pid)
+        proc_mem.process_vm_readv = None
+
+        print('Root pointer + timer, raw reads:')
+        bench('batched, one process_vm_readv', lambda: batched.read(requests))
+        bench('single-value, two process_vm_readv', lambda: [batched.read([request]) for request in requests])
+        bench('two /proc/<pid>/mem preads', lambda: proc_mem.read(requests))
+        print(f'{len(requests) * 64} addresses, raw reads:')
+        bench('batched, one process_vm_readv', lambda: batched.read(requests * 64), READS // 10)
+        bench('/proc/<pid>/mem preads', lambda: proc_mem.read(requests * 64), READS // 10)
+        print('LinuxHelper, including validation and parsing:')
+        bench('read_current_timer', helper.read_current_timer)
+        print('Full pointer chain walk:')
+        bench('get_memory_address', helper.get_memory_address, READS // 10)
+        print(f'Re-resolutions: {helper.re_resolutions}, read failures: {helper.read_failures}')
+    finally:
+        standin.terminate()
+        standin.wait()
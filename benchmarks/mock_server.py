@@ -0,0 +1,161 @@
+# Minimal Archipelago server for offline testing and benchmarks
+# Usage: python -m benchmarks.mock_server [--port 38281] [--locations 1000] [--players 10]
+from websockets.asyncio.server import serve, ServerConnection
+from websockets.exceptions import ConnectionClosed
+import argparse
+import asyncio
+import hashlib
+import random
+import json
+
+class MockSeed:
+    def __init__(self, locations: int = 1000, players: int = 10, slot: int = 1, games: int = 1, checked_ratio: float = 0.5, seed: int = 0) -> None:
+        rng: random.Random = random.Random(seed)
+        self.seed_name: str = f'mock-{locations}-{players}-{seed}'
+        self.slot: int = slot
+        self.players: list[dict[str, any]] = [{'class': 'NetworkPlayer', 'team': 0, 'slot': player, 'alias': f'Player{player}', 'name': f'Player{player}'} for player in range(1, players + 1)]
+        self.games: list[str] = [f'Game{i}' for i in range(games)]
+        self.slot_games: dict[int, str] = {player: self.games[player % games] for player in range(1, players + 1)}
+
+        # The locations in our world, each holding an item for a random player
+        self.location_ids: list[int] = list(range(1000, 1000 + locations))
+        checked: int = int(locations * checked_ratio)
+        self.checked_locations: list[int] = self.location_ids[:checked]
+        self.missing_locations: list[int] = self.location_ids[checked:]
+        self.items: dict[int, dict[str, any]] = {
+            location_id: {'class': 'NetworkItem', 'item': rng.randint(1, 500), 'location': location_id, 'player': rng.randint(1, players), 'flags': rng.choice([0, 0, 1, 2, 4])}
+            for location_id in self.location_ids
+        }
+
+    def get_datapackage(self, game: str) -> dict[str, any]:
+        package: dict[str, any] = {
+            'item_name_to_id': {f'{game} Item {item_id}': item_id for item_id in range(1, 501)},
+            'location_name_to_id': {f'{game} Location {location_id}': location_id for location_id in self.location_ids},
+        }
+        package['checksum'] = hashlib.sha1(json.dumps(package, sort_keys=True).encode()).hexdigest()
+        return package
+
+class MockServer:
+    def __init__(self, seed: MockSeed, password: str = '') -> None:
+        self.seed: MockSeed = seed
+        self.password: str = password
+        self.datapackages: dict[str, dict[str, any]] = {game: seed.get_datapackage(game) for game in seed.games}
+        self.data_storage: dict[str, any] = {}
+
+        self.connections: set[ServerConnection] = set()
+        self.commands_received: dict[str, int] = {}
+        self.frames_received: int = 0
+        self.hints: list[int] = []
+        self.hint_event: asyncio.Event = asyncio.Event()
+
+    async def send(self, websocket: ServerConnection, frames: list[dict[str, any]]) -> None:
+        await websocket.send(json.dumps(frames))
+
+    async def broadcast(self, frames: list[dict[str, any]]) -> None:
+        message: str = json.dumps(frames)
+        for websocket in list(self.connections):
+            try:
+                await websocket.send(message)
+            except ConnectionClosed:
+                pass
+
+    async def handler(self, websocket: ServerConnection) -> None:
+        self.connections.add(websocket)
+        try:
+            await self.send(websocket, [{
+                'cmd': 'RoomInfo', 'password': self.password != '', 'games': self.seed.games, 'tags': [],
+                'version': {'major': 0, 'minor': 6, 'build': 1, 'class': 'Version'},
+                'generator_version': {'major': 0, 'minor': 6, 'build': 1, 'class': 'Version'},
+                'permissions': {'release': 2, 'collect': 2, 'remaining': 1}, 'hint_cost': 10, 'location_check_points': 1,
+                'datapackage_checksums': {game: package['checksum'] for game, package in self.datapackages.items()},
+                'seed_name': self.seed.seed_name, 'time': 0.0,
+            }])
+            async for message in websocket:
+                self.frames_received += 1
+                for frame in json.loads(message):
+                    await self.handle(websocket, frame)
+        except ConnectionClosed:
+            pass
+        finally:
+            self.connections.discard(websocket)
+
+    async def handle(self, websocket: ServerConnection, frame: dict[str, any]) -> None:
+        cmd: str = frame['cmd']
+        self.commands_received[cmd] = self.commands_received.get(cmd, 0) + 1
+        match cmd:
+            case 'Connect':
+                if frame['password'] != self.password:
+                    await self.send(websocket, [{'cmd': 'ConnectionRefused', 'errors': ['InvalidPassword']}])
+                    return
+                await self.send(websocket, [{
+                    'cmd': 'Connected', 'team': 0, 'slot': self.seed.slot, 'players': self.seed.players,
+                    'missing_locations': self.seed.missing_locations, 'checked_locations': self.seed.checked_locations,
+                    'slot_data': {}, 'hint_points': 0,
+                    'slot_info': {str(player): {'class': 'NetworkSlot', 'name': f'Player{player}', 'game': game, 'type': 1, 'group_members': []} for player, game in self.seed.slot_games.items()},
+                }])
+            case 'GetDataPackage':
+                games: list[str] = frame.get('games', self.seed.games)
+                await self.send(websocket, [{'cmd': 'DataPackage', 'data': {'games': {game: self.datapackages[game] for game in games if game in self.datapackages}}}])
+            case 'LocationScouts':
+                items: list[dict[str, any]] = [self.seed.items[location_id] for location_id in frame['locations'] if location_id in self.seed.items]
+                await self.send(websocket, [{'cmd': 'LocationInfo', 'locations': items}])
+                if frame.get('create_as_hint'):
+                    for item in items:
+                        self.hints.append(item['location'])
+                        await self.broadcast([self.make_hint(item)])
+                    self.hint_event.set()
+            case 'LocationChecks':
+                await self.send(websocket, [{'cmd': 'RoomUpdate', 'checked_locations': frame['locations']}])
+            case 'Get':
+                await self.send(websocket, [{'cmd': 'Retrieved', 'keys': {key: self.data_storage.get(key) for key in frame['keys']}}])
+            case 'SetNotify':
+                pass
+            case 'Say':
+                # '!flood <frames>' makes the server broadcast busy room traffic, for benchmarks
+                words: list[str] = frame['text'].split()
+                if len(words) == 2 and words[0] == '!flood':
+                    asyncio.create_task(self.flood(int(words[1])))
+            case _:
+                await self.send(websocket, [{'cmd': 'InvalidPacket', 'type': 'cmd', 'original_cmd': cmd, 'text': f'Unknown command {cmd}'}])
+
+    def make_hint(self, item: dict[str, any]) -> dict[str, any]:
+        return {'cmd': 'PrintJSON', 'type': 'Hint', 'receiving': item['player'], 'item': item, 'found': False, 'data': [
+            {'type': 'player_id', 'text': str(item['player'])}, {'text': '\'s '},
+            {'type': 'item_id', 'text': str(item['item']), 'player': item['player'], 'flags': item['flags']},
+            {'text': ' is at '}, {'type': 'location_id', 'text': str(item['location']), 'player': self.seed.slot},
+            {'text': ' in '}, {'type': 'player_id', 'text': str(self.seed.slot)}, {'text': '\'s World'},
+        ]}
+
+    async def flood(self, frames: int, batch: int = 10) -> None:
+        # Busy room traffic, other players' hints and checks
+        location_ids: list[int] = self.seed.location_ids
+        for start in range(0, frames, batch):
+            messages: list[dict[str, any]] = []
+            for i in range(start, min(frames, start + batch)):
+                if i % 2 == 0:
+                    messages.append(self.make_hint(self.seed.items[location_ids[i % len(location_ids)]]))
+                else:
+                    messages.append({'cmd': 'RoomUpdate', 'hint_points': i})
+            await self.broadcast(messages)
+
+async def run_server(host: str, port: int, seed: MockSeed, ready: asyncio.Future | None = None) -> None:
+    mock: MockServer = MockServer(seed)
+    async with serve(mock.handler, host, port, max_size=None) as server:
+        bound_port: int = server.sockets[0].getsockname()[1]
+        print(bound_port, flush=True)
+        if ready is not None:
+            ready.set_result((mock, bound_port))
+        await asyncio.Future()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mock Archipelago server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0, help='0 picks a free port, which is printed on startup')
+    parser.add_argument('--locations', type=int, default=1000)
+    parser.add_argument('--players', type=int, default=10)
+    parser.add_argument('--games', type=int, default=1)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_server(args.host, args.port, MockSeed(args.locations, args.players, games=args.games)))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,85 @@
+# Stand-in for Nothing.exe with the timer pointer chain laid out at known addresses
+# Maps a sparse file named like the Mono DLL so it shows up in /proc/<pid>/maps, then counts the timer up
+# SIGUSR1 moves the chain to new memory and swaps the root pointer, like the game reloading a scene. SIGUSR2 breaks or restores the chain.
+# Usage: python -m benchmarks.standin_process [seconds per tick] [--value fixed timer value]
+from nothing import TIMER_MODULE, TIMER_ROOT_OFFSET, TIMER_POINTER_OFFSETS
+import tempfile
+import argparse
+import ctypes
+import signal
+import struct
+import mmap
+import time
+import os
+
+class PointerChain:
+    def __init__(self, module: mmap.mmap) -> None:
+        self.module: mmap.mmap = module
+        self.levels: list = []
+        self.timer: ctypes.c_float | None = None
+        self.broken: bool = False
+        self.build()
+
+    def build(self) -> None:
+        # One buffer per level of the chain, each holding the pointer to the next at its offset
+        # The old buffers stay alive, so a reader still following the old root sees stale but mapped memory
+        levels = [ctypes.create_string_buffer(0x1000) for _ in TIMER_POINTER_OFFSETS]
+        for level, next_level, offset in zip(levels, levels[1:], TIMER_POINTER_OFFSETS):
+            struct.pack_into('<Q', level, offset, ctypes.addressof(next_level))
+        timer = ctypes.c_float.from_buffer(levels[-1], TIMER_POINTER_OFFSETS[-1])
+        if self.timer is not None:
+            timer.value = self.timer.value
+        self.levels.append(levels)
+        self.timer = timer
+        self.module[TIMER_ROOT_OFFSET:TIMER_ROOT_OFFSET + 8] = struct.pack('<Q', ctypes.addressof(levels[0]))
+        self.broken = False
+
+    def toggle_broken(self) -> None:
+        # Moves the chain with a null link in the middle, so it can't be followed until it's restored
+        if not self.broken:
+            self.build()
+        levels = self.levels[-1]
+        self.broken = not self.broken
+        struct.pack_into('<Q', levels[0], TIMER_POINTER_OFFSETS[0], 0 if self.broken else ctypes.addressof(levels[1]))
+
+def main(tick: float = 0.1, value: float | None = None) -> None:
+    directory: str = tempfile.mkdtemp()
+    path: str = os.path.join(directory, TIMER_MODULE)
+    size: int = TIMER_ROOT_OFFSET + mmap.PAGESIZE
+    with open(path, 'wb') as f:
+        f.truncate(size)
+    with open(path, 'r+b') as f:
+        module: mmap.mmap = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_COPY)
+
+    chain: PointerChain = PointerChain(module)
+    def on_signal(signum: int, frame) -> None:
+        if signum == signal.SIGUSR1:
+            chain.build()
+            print('moved', flush=True)
+        else:
+            chain.toggle_broken()
+            print('broken' if chain.broken else 'restored', flush=True)
+    signal.signal(signal.SIGUSR1, on_signal)
+    signal.signal(signal.SIGUSR2, on_signal)
+
+    # The timer holds its first value before the pid is printed, so readers never see it unset
+    start: float = time.monotonic()
+    chain.timer.value = 0.0 if value is None else value
+    print(os.getpid(), flush=True)
+    try:
+        while True:
+            chain.timer.value = time.monotonic() - start if value is None else value
+            time.sleep(tick)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        module.close()
+        os.remove(path)
+        os.rmdir(directory)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Stand-in process with the Nothing timer pointer chain')
+    parser.add_argument('tick', type=float, nargs='?', default=0.1, help='Seconds per tick')
+    parser.add_argument('--value', type=float, default=None, help='Hold the timer at this value instead of counting up')
+    args = parser.parse_args()
+    main(args.tick, args.value)
@@ -0,0 +1,51 @@
+from typing import Callable
+
+class DataStorage(dict):
+    # Local mirror of server data storage keys, kept current by SetReply instead of repeated Gets
+    def __init__(self) -> None:
+        super().__init__()
+        self.tracked: set[str] = set() # Keys the server notifies us about on the current connection
+        self.watchers: dict[str, list[Callable[[str, any, any], None]]] = {}
+
+    def track(self, keys: list[str]) -> list[str]:
+        # Returns the keys that still need a SetNotify and Get
+        new_keys: list[str] = [key for key in keys if key not in self.tracked]
+        self.tracked.update(new_keys)
+        return new_keys
+
+    def reset_tracking(self) -> None:
+        # Notifications only last for one connection, and changes may have been missed while disconnected
+        self.tracked.clear()
+
+    def watch(self, key: str, callback: Callable[[str, any, any], None]) -> None:
+        # Callbacks get the key, the new value and the previous value
+        self.watchers.setdefault(key, []).append(callback)
+
+    def unwatch(self, key: str, callback: Callable[[str, any, any], None]) -> None:
+        callbacks: list[Callable[[str, any, any], None]] = self.watchers.get(key, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def apply_retrieved(self, keys: dict[str, any]) -> None:
+        for key, value in keys.items():
+            self.__apply(key, value, self.get(key))
+
+    def apply_set_reply(self, key: str, value: any, original_value: any = None) -> None:
+        self.__apply(key, value, self.get(key, original_value))
+
+    def __apply(self, key: str, value: any, previous: any) -> None:
+        current: any = self.get(key)
+        if isinstance(current, list) and isinstance(value, list) and len(value) >= len(current) and value[:len(current)] == current:
+            # Lists like hints only grow, so keep the same object and append the new tail
+            previous = current.copy() if self.watchers.get(key) else None
+            current.extend(value[len(current):])
+        elif isinstance(current, dict) and isinstance(value, dict):
+            previous = current.copy() if self.watchers.get(key) else None
+            for removed in current.keys() - value.keys():
+                del current[removed]
+            current.update(value)
+        else:
+            self[key] = value
+
+        for callback in self.watchers.get(key, []):
+            callback(key, self[key], previous)
@@ -0,0 +1,73 @@
+import marshal
+import os
+import re
+
+DEFAULT_CACHE_DIR: str = os.path.join(os.path.expanduser('~'), '.apnothing')
+
+class DataPackageCache:
+    # Per-game id -> name tables, persisted on disk keyed by the game's DataPackage checksum
+    # Shared by sessions in different rooms, so the same game can be in memory at several checksums
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR) -> None:
+        self.cache_dir: str = os.path.join(cache_dir, 'datapackage')
+
+        self.item_names: dict[tuple[str, str], dict[int, str]] = {} # (game, checksum) -> table
+        self.location_names: dict[tuple[str, str], dict[int, str]] = {}
+
+    def __get_path(self, game: str, checksum: str) -> str:
+        safe_game: str = re.sub(r'[^A-Za-z0-9_.-]', '_', game)
+        # marshal's format can change between Python versions, so it's part of the file name
+        return os.path.join(self.cache_dir, f'{safe_game}_{checksum}.v{marshal.version}.marshal')
+
+    def load(self, games: list[str], checksums: dict[str, str]) -> list[str]:
+        # Returns the games that still have to be fetched from the server
+        missing_games: list[str] = []
+        for game in games:
+            checksum: str | None = checksums.get(game)
+            if checksum is None:
+                missing_games.append(game)
+            elif (game, checksum) in self.item_names:
+                continue
+            elif not self.__load_game(game, checksum):
+                missing_games.append(game)
+        return missing_games
+
+    def __load_game(self, game: str, checksum: str) -> bool:
+        try:
+            with open(self.__get_path(game, checksum), 'rb') as f:
+                item_names, location_names = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return False
+        self.__set_game(game, checksum, item_names, location_names)
+        return True
+
+    def __set_game(self, game: str, checksum: str, item_names: dict[int, str], location_names: dict[int, str]) -> None:
+        self.item_names[(game, checksum)] = item_names
+        self.location_names[(game, checksum)] = location_names
+
+    def store(self, games: dict[str, dict[str, any]]) -> dict[str, str]:
+        # Returns the checksum each game's tables were stored under, '' when the package had none
+        checksums: dict[str, str] = {}
+        for game, package in games.items():
+            item_names: dict[int, str] = {item_id: name for name, item_id in package['item_name_to_id'].items()}
+            location_names: dict[int, str] = {location_id: name for name, location_id in package['location_name_to_id'].items()}
+            checksum: str = package.get('checksum', '')
+            self.__set_game(game, checksum, item_names, location_names)
+            checksums[game] = checksum
+
+            if checksum == '':
+                continue # Nothing to key the file on, it gets fetched again next time
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                path: str = self.__get_path(game, checksum)
+                with open(path + '.tmp', 'wb') as f:
+                    marshal.dump((item_names, location_names), f)
+                os.replace(path + '.tmp', path)
+            except OSError as e:
+                print(f'Could not cache DataPackage for {game}: {str(e)}')
+        return checksums
+
+    def item_name(self, game: str, item_id: int, checksum: str = '') -> str:
+        return self.item_names.get((game, checksum), {}).get(item_id, f'Unknown Item {item_id}')
+
+    def location_name(self, game: str, location_id: int, checksum: str = '') -> str:
+        return self.location_names.get((game, checksum), {}).get(location_id, f'Unknown Location {location_id}')
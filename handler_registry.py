@@ -0,0 +1,73 @@
+from ap_packets import APPacket, PacketDirection
+from typing import Callable
+import time
+
+class HandlerStats:
+    __slots__ = ('count', 'total_time', 'max_time')
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.total_time: float = 0.0 # Seconds spent building the packet and running its handlers
+        self.max_time: float = 0.0
+
+    def add(self, elapsed: float) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+
+class HandlerRegistry:
+    # Maps incoming commands to the callables that handle them, with timing per command
+    def __init__(self) -> None:
+        self.factories: dict[str, Callable[[dict], APPacket]] = {}
+        self.handlers: dict[str, list[Callable[[APPacket], None]]] = {}
+        self.ignored: set[str] = set()
+        self.unhandled: Callable[[dict], None] | None = None # Called for frames nothing is registered for
+
+        self.stats: dict[str, HandlerStats] = {}
+        self.ignored_counts: dict[str, int] = {}
+        self.timing: bool = True
+
+    def register(self, cmd: str, handler: Callable[[APPacket], None], factory: Callable[[dict], APPacket] | None = None) -> None:
+        # Plugins can register more handlers for a command, they run after the ones before them
+        self.handlers.setdefault(cmd, []).append(handler)
+        if factory is not None:
+            self.factories[cmd] = factory
+
+    def unregister(self, cmd: str, handler: Callable[[APPacket], None]) -> None:
+        handlers: list[Callable[[APPacket], None]] = self.handlers.get(cmd, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    def ignore(self, cmd: str) -> None:
+        # Ignored commands are dropped before their packet is even built
+        self.ignored.add(cmd)
+
+    def unignore(self, cmd: str) -> None:
+        self.ignored.discard(cmd)
+
+    def dispatch(self, frame: dict) -> None:
+        cmd: str = frame['cmd']
+        if cmd in self.ignored:
+            self.ignored_counts[cmd] = self.ignored_counts.get(cmd, 0) + 1
+            return
+        start: float = time.perf_counter() if self.timing else 0.0
+
+        handlers: list[Callable[[APPacket], None]] | None = self.handlers.get(cmd)
+        if handlers:
+            factory: Callable[[dict], APPacket] | None = self.factories.get(cmd)
+            packet: APPacket = factory(frame) if factory is not None else APPacket(cmd, PacketDirection.Incoming, frame)
+            for handler in handlers:
+                handler(packet)
+        elif self.unhandled is not None:
+            self.unhandled(frame)
+
+        if self.timing:
+            stats: HandlerStats | None = self.stats.get(cmd)
+            if stats is None:
+                stats = self.stats[cmd] = HandlerStats()
+            stats.add(time.perf_counter() - start)
+
+    def get_stats(self) -> list[tuple[str, HandlerStats]]:
+        # Busiest commands first
+        return sorted(self.stats.items(), key=lambda item: item[1].total_time, reverse=True)
@@ -0,0 +1,92 @@
+from ap_packets import APNetworkItem, APNetworkItemType
+import random
+
+class IndexedSet:
+    def __init__(self) -> None:
+        self.items: list[int] = []
+        self.positions: dict[int, int] = {} # Value -> index into self.items
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __contains__(self, value: int) -> bool:
+        return value in self.positions
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def add(self, value: int) -> None:
+        if value not in self.positions:
+            self.positions[value] = len(self.items)
+            self.items.append(value)
+
+    def discard(self, value: int) -> None:
+        pos: int | None = self.positions.pop(value, None)
+        if pos is None:
+            return
+        # Swap the last value into the hole so removal stays O(1)
+        last: int = self.items.pop()
+        if pos < len(self.items):
+            self.items[pos] = last
+            self.positions[last] = pos
+
+class HintCandidates:
+    HINTABLE_TYPES: tuple[APNetworkItemType, ...] = (APNetworkItemType.PROGRESSION, APNetworkItemType.USEFUL)
+
+    def __init__(self) -> None:
+        self.missing_locations: set[int] = set()
+        self.item_types: dict[int, APNetworkItemType] = {} # Location id -> classification of our item placed there
+        self.by_type: dict[APNetworkItemType, IndexedSet] = {item_type: IndexedSet() for item_type in self.HINTABLE_TYPES}
+        self.hinted: set[int] = set() # Never candidates again, whatever set_missing or add_item are given
+
+    def __len__(self) -> int:
+        return sum(len(candidates) for candidates in self.by_type.values())
+
+    def __contains__(self, location_id: int) -> bool:
+        item_type: APNetworkItemType | None = self.item_types.get(location_id)
+        return item_type is not None and location_id in self.by_type[item_type]
+
+    def set_missing(self, locations: list[int] | set[int]) -> None:
+        self.missing_locations = set(locations)
+        for item_type, candidates in self.by_type.items():
+            for location_id in list(candidates):
+                if location_id not in self.missing_locations:
+                    candidates.discard(location_id)
+        for location_id, item_type in self.item_types.items():
+            if location_id in self.missing_locations:
+                self.by_type[item_type].add(location_id)
+
+    def add_item(self, item: APNetworkItem, slot_id: int) -> None:
+        if item.player_id != slot_id or item.type not in self.by_type or item.location_id in self.hinted:
+            return
+        self.item_types[item.location_id] = item.type
+        if item.location_id in self.missing_locations:
+            self.by_type[item.type].add(item.location_id)
+
+    def mark_checked(self, locations: list[int]) -> None:
+        for location_id in locations:
+            self.missing_locations.discard(location_id)
+            self.discard(location_id)
+
+    def mark_hinted(self, locations: list[int] | set[int]) -> None:
+        for location_id in locations:
+            self.hinted.add(location_id)
+            self.discard(location_id)
+            self.item_types.pop(location_id, None)
+
+    def discard(self, location_id: int) -> None:
+        item_type: APNetworkItemType | None = self.item_types.get(location_id)
+        if item_type is not None:
+            self.by_type[item_type].discard(location_id)
+
+    def sample(self) -> int | None:
+        total: int = len(self)
+        if total == 0:
+            return None
+        # Pick a set weighted by its size so every candidate is equally likely
+        index: int = random.randrange(total)
+        for candidates in self.by_type.values():
+            if index < len(candidates):
+                return candidates.items[index]
+            index -= len(candidates)
+        return None
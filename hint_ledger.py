@@ -0,0 +1,160 @@
+from datapackage import DEFAULT_CACHE_DIR
+from enum import IntEnum
+import asyncio
+import struct
+import os
+import re
+
+class LedgerRecord(IntEnum):
+    EARNED = 0    # count hints earned
+    REDEEMED = 1  # count locations scouted as hints in one batch, written before the scout is sent
+    CONFIRMED = 2 # The server answered every location of the batch
+    SEED = 3      # Later records belong to this seed, count bytes of name follow
+
+class HintLedger:
+    # Append-only log of hints earned and redeemed, so none are lost or given twice across crashes and reconnects.
+    # A batch that was redeemed but never confirmed is sent again with the same locations, which the server treats as the same hints.
+    HEADER: struct.Struct = struct.Struct('<BIH') # type, batch, count
+    LOCATION: struct.Struct = struct.Struct('<q')
+
+    def __init__(self, path: str | None = None, commit_delay: float = 0.05) -> None:
+        self.path: str | None = path # None keeps the ledger in memory only
+        self.commit_delay: float = commit_delay # Seconds records wait so several share one fsync
+
+        self.seed: str = ''
+        self.earned: int = 0
+        self.redeemed: int = 0
+        self.hinted: set[int] = set() # Locations already hinted on the current seed
+        self.unconfirmed: dict[int, set[int]] = {} # Batch -> locations the server hasn't answered yet
+        self.batch_of: dict[int, int] = {} # Location -> its unconfirmed batch
+        self.next_batch: int = 0
+
+        self.buffer: list[bytes] = []
+        self.commit_lock: asyncio.Lock = asyncio.Lock()
+        self.commit_task: asyncio.Task | None = None
+        self.file = None
+        if path is not None:
+            self.__load()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.file = open(path, 'ab', buffering=0)
+
+    @property
+    def pending(self) -> int:
+        return self.earned - self.redeemed
+
+    def __load(self) -> None:
+        try:
+            with open(self.path, 'rb') as f:
+                data: bytes = f.read()
+        except OSError:
+            return
+        offset: int = 0
+        while offset + self.HEADER.size <= len(data):
+            record_type, batch, count = self.HEADER.unpack_from(data, offset)
+            payload_size: int = count * self.LOCATION.size if record_type == LedgerRecord.REDEEMED else count if record_type == LedgerRecord.SEED else 0
+            end: int = offset + self.HEADER.size + payload_size
+            if end > len(data):
+                break
+            payload: bytes = data[offset + self.HEADER.size:end]
+            if record_type == LedgerRecord.REDEEMED:
+                self.__apply(record_type, batch, count, [location_id for location_id, in self.LOCATION.iter_unpack(payload)])
+            else:
+                self.__apply(record_type, batch, count, payload.decode() if record_type == LedgerRecord.SEED else None)
+            offset = end
+
+        if offset != len(data):
+            # A torn record from a crash mid-write, drop it so new records line up
+            with open(self.path, 'r+b') as f:
+                f.truncate(offset)
+
+    def __apply(self, record_type: LedgerRecord, batch: int, count: int, payload: list[int] | str | None) -> None:
+        match record_type:
+            case LedgerRecord.EARNED:
+                self.earned += count
+            case LedgerRecord.REDEEMED:
+                self.redeemed += count
+                self.hinted.update(payload)
+                self.unconfirmed[batch] = set(payload)
+                for location_id in payload:
+                    self.batch_of[location_id] = batch
+                self.next_batch = max(self.next_batch, batch + 1)
+            case LedgerRecord.CONFIRMED:
+                for location_id in self.unconfirmed.pop(batch, ()):
+                    self.batch_of.pop(location_id, None)
+            case LedgerRecord.SEED:
+                if payload != self.seed:
+                    # Locations of another seed mean nothing here, hints never confirmed there are given back
+                    self.redeemed -= sum(len(locations) for locations in self.unconfirmed.values())
+                    self.unconfirmed.clear()
+                    self.batch_of.clear()
+                    self.hinted.clear()
+                    self.seed = payload
+
+    def __append(self, record_type: LedgerRecord, batch: int, count: int, payload: bytes = b'') -> None:
+        if self.file is None:
+            return
+        self.buffer.append(self.HEADER.pack(record_type, batch, count) + payload)
+        if self.commit_task is None or self.commit_task.done():
+            try:
+                self.commit_task = asyncio.get_running_loop().create_task(self.__commit_later())
+            except RuntimeError:
+                pass # No event loop, close() writes it
+
+    def earn(self, count: int = 1) -> None:
+        self.__apply(LedgerRecord.EARNED, 0, count, None)
+        self.__append(LedgerRecord.EARNED, 0, count)
+
+    def redeem(self, locations: list[int]) -> int:
+        batch: int = self.next_batch
+        self.__apply(LedgerRecord.REDEEMED, batch, len(locations), locations)
+        self.__append(LedgerRecord.REDEEMED, batch, len(locations), b''.join(self.LOCATION.pack(location_id) for location_id in locations))
+        return batch
+
+    def acknowledge(self, locations: list[int]) -> None:
+        # Called with every location the server sent info for, batches are confirmed once all of theirs arrived
+        for location_id in locations:
+            batch: int | None = self.batch_of.pop(location_id, None)
+            if batch is None:
+                continue
+            remaining: set[int] = self.unconfirmed[batch]
+            remaining.discard(location_id)
+            if not remaining:
+                self.__apply(LedgerRecord.CONFIRMED, batch, 0, None)
+                self.__append(LedgerRecord.CONFIRMED, batch, 0)
+
+    def set_seed(self, seed_name: str) -> None:
+        if seed_name == self.seed:
+            return
+        name: bytes = seed_name.encode()
+        self.__apply(LedgerRecord.SEED, 0, len(name), seed_name)
+        self.__append(LedgerRecord.SEED, 0, len(name), name)
+
+    async def __commit_later(self) -> None:
+        await asyncio.sleep(self.commit_delay)
+        await self.commit()
+
+    async def commit(self) -> None:
+        # Everything buffered is durable once this returns. Records added while a commit is running go in the next one together.
+        async with self.commit_lock:
+            if not self.buffer or self.file is None:
+                return
+            data: bytes = b''.join(self.buffer)
+            self.buffer.clear()
+            await asyncio.to_thread(self.__write, data)
+
+    def __write(self, data: bytes) -> None:
+        self.file.write(data)
+        os.fsync(self.file.fileno())
+
+    async def close(self) -> None:
+        if self.commit_task is not None:
+            self.commit_task.cancel()
+        await self.commit()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+def get_ledger_path(ip: str, port: int | str, slot_name: str, cache_dir: str = DEFAULT_CACHE_DIR) -> str:
+    # Hints are earned before the seed is known, so the ledger belongs to the room address and slot
+    safe_name: str = re.sub(r'[^A-Za-z0-9_.-]', '_', f'{ip}_{port}_{slot_name}')
+    return os.path.join(cache_dir, 'ledger', f'{safe_name}.bin')
@@ -0,0 +1,174 @@
+# Runs several slots in one process and event loop, sharing DataPackages, the cache directory and the JSON codec
+# Usage: python host.py slots.json
+from archipelago import Archipelago, redeem_hints, add_timer_metrics
+from nothing import NothingHintGame, TimerWorker, TimerEvent
+from datapackage import DataPackageCache, DEFAULT_CACHE_DIR
+from hint_ledger import get_ledger_path
+from metrics import Metrics, MetricsServer, dump_periodically
+from ap_packets import JSONCodec, get_codec
+import argparse
+import asyncio
+import signal
+import json
+import sys
+
+# Setting -> (type, default). Settings without a default are required.
+SLOT_SETTINGS: dict[str, tuple[type, any]] = {
+    'ip': (str, 'archipelago.gg'),
+    'port': (int, None),
+    'slot_name': (str, None),
+    'password': (str, ''),
+    'wss': (bool, True),
+    'record': (str, ''),
+    'timers': (list, None), # Names of the timers that earn hints for this slot, all of them when left out
+}
+
+TIMER_SETTINGS: dict[str, tuple[type, any]] = {
+    'milestone': (int, 300),
+    'pid': (int, None), # Which running game to read, needed when there is more than one
+}
+
+HOST_SETTINGS: dict[str, tuple[type, any]] = {
+    'cache_dir': (str, DEFAULT_CACHE_DIR),
+    'codec': (str, ''), # orjson, msgspec or json, the fastest installed when left out
+    'metrics_port': (int, 0),
+    'metrics_file': (str, ''),
+    'metrics_interval': (float, 60.0),
+}
+
+def read_settings(values: dict[str, any], settings: dict[str, tuple[type, any]], where: str, required: bool = True) -> dict[str, any]:
+    unknown: set[str] = values.keys() - settings.keys()
+    if unknown:
+        print(f'Unknown settings in {where}: {", ".join(sorted(unknown))}')
+        sys.exit(2)
+    result: dict[str, any] = {}
+    for name, (value_type, default) in settings.items():
+        if name in values:
+            if not isinstance(values[name], value_type) and not (value_type is float and isinstance(values[name], int)):
+                print(f'Setting \'{name}\' in {where} should be a {value_type.__name__}')
+                sys.exit(2)
+            result[name] = values[name]
+        elif default is None and required:
+            print(f'Missing setting \'{name}\' in {where}')
+            sys.exit(2)
+        else:
+            result[name] = default
+    return result
+
+def load_host_config(path: str) -> dict[str, any]:
+    # {"timers": {"name": {...}, ...}, "slots": [{...}, ...], plus any HOST_SETTINGS}
+    try:
+        with open(path) as f:
+            config: dict[str, any] = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f'Could not read host config {path}: {str(e)}')
+        sys.exit(2)
+
+    slots: list[dict[str, any]] = config.pop('slots', [])
+    if not slots:
+        print(f'No slots in host config {path}')
+        sys.exit(2)
+    # Without any timers configured, one timer on the first game found drives every slot
+    timer_configs: dict[str, dict[str, any]] = config.pop('timers', {'default': {}})
+    if not isinstance(timer_configs, dict) or not timer_configs:
+        print(f'No timers in host config {path}, leave "timers" out to read the first game found')
+        sys.exit(2)
+
+    host: dict[str, any] = read_settings(config, HOST_SETTINGS, path)
+    host['timers'] = {name: read_settings(timer, TIMER_SETTINGS, f'timer \'{name}\'', required=False) for name, timer in timer_configs.items()}
+    host['slots'] = []
+    for index, slot in enumerate(slots):
+        slot = read_settings(slot, {**SLOT_SETTINGS, 'timers': (list, list(host['timers']))}, f'slot {index}')
+        if not slot['timers']:
+            # Hints only come from timers, so the slot could never earn one
+            print(f'Slot {slot["slot_name"]} uses no timers, leave "timers" out to use all of them')
+            sys.exit(2)
+        for timer_name in slot['timers']:
+            if timer_name not in host['timers']:
+                print(f'Slot {slot["slot_name"]} uses unknown timer \'{timer_name}\'')
+                sys.exit(2)
+        host['slots'].append(slot)
+    return host
+
+async def host(config: dict[str, any]) -> None:
+    # One copy of each DataPackage, loaded once however many slots play that game
+    datapackage: DataPackageCache = DataPackageCache(config['cache_dir'])
+    codec: JSONCodec = get_codec(config['codec'] or None)
+    metrics: Metrics = Metrics()
+
+    sessions: list[Archipelago] = []
+    for slot in config['slots']:
+        ap: Archipelago = Archipelago(slot['port'], slot['slot_name'], ip=slot['ip'], password=slot['password'], wss=slot['wss'], datapackage=datapackage, cache_dir=config['cache_dir'], codec=codec, record_path=slot['record'], metrics=Metrics(labels={'slot': slot['slot_name']}), ledger_path=get_ledger_path(slot['ip'], slot['port'], slot['slot_name'], config['cache_dir']))
+        metrics.add_child(ap.metrics)
+        sessions.append(ap)
+
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    timers: dict[str, NothingHintGame] = {}
+    workers: list[TimerWorker] = []
+    redeemers: list[asyncio.Task] = []
+    for timer_name, timer in config['timers'].items():
+        driven: list[Archipelago] = [ap for ap, slot in zip(sessions, config['slots']) if timer_name in slot['timers']]
+        if not driven:
+            print(f'Timer \'{timer_name}\' drives no slots, not reading it')
+            continue
+        nothing: NothingHintGame = NothingHintGame(timer['milestone'], pid=timer['pid'])
+        add_timer_metrics(metrics, nothing, timer=timer_name)
+        events: asyncio.Queue[TimerEvent] = asyncio.Queue()
+        workers.append(TimerWorker(nothing, loop, events))
+        redeemers.append(asyncio.create_task(redeem_hints(driven, events)))
+        timers[timer_name] = nothing
+
+    metrics_server: MetricsServer | None = None
+    if config['metrics_port'] > 0:
+        metrics_server = MetricsServer(metrics, port=config['metrics_port'])
+        await metrics_server.start()
+    dumper: asyncio.Task | None = asyncio.create_task(dump_periodically(metrics, config['metrics_file'], config['metrics_interval'])) if config['metrics_file'] else None
+
+    for worker in workers:
+        worker.start()
+    networks: dict[asyncio.Task, Archipelago] = {asyncio.create_task(ap.run()): ap for ap in sessions}
+    try:
+        # Runs until every timer or every slot has stopped, a slot whose timer stopped stays connected for the others' sake
+        pending: set[asyncio.Task] = set(networks) | set(redeemers)
+        while any(not redeemer.done() for redeemer in redeemers) and any(not network.done() for network in networks):
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                ap: Archipelago | None = networks.get(task)
+                if ap is None:
+                    task.result()
+                    continue
+                # One slot failing, e.g. refused for a wrong password, leaves the others running
+                ap.stopping = True
+                error: BaseException | None = task.exception()
+                print(f'Slot {ap.slot_name} stopped' + (f': {str(error)}' if error is not None else ''))
+    finally:
+        for task in [*networks, *redeemers]:
+            task.cancel()
+        if dumper is not None:
+            dumper.cancel()
+        if metrics_server is not None:
+            await metrics_server.stop()
+        for worker in workers:
+            worker.stop()
+        for timer_name, nothing in timers.items():
+            print(f'Timer \'{timer_name}\' reads: {nothing.reads} ({nothing.get_read_rate():.2f}/s)')
+        await asyncio.gather(*(ap.disconnect() for ap in sessions))
+
+async def run(config: dict[str, any]) -> None:
+    # Supervisors stop services with SIGTERM, treat it like Ctrl+C so every connection is closed cleanly
+    task: asyncio.Task = asyncio.current_task()
+    if sys.platform != 'win32':
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+    try:
+        await host(config)
+    except asyncio.CancelledError:
+        pass
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run several Archipelago slots in one process, each earning hints from one or more game timers')
+    parser.add_argument('config', help='JSON file with "slots", optional "timers" and host settings: ' + ', '.join(HOST_SETTINGS))
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(load_host_config(args.config)))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,103 @@
+from ap_packets import APNetworkItem, APNetworkItemType
+from array import array
+from bisect import bisect_left
+
+class ItemStore:
+    # Scouted items as flat typed columns sorted by location, found by binary search.
+    # No per-item objects or index dict, about 22 bytes per item against 80 for a list of APNetworkItem.
+    def __init__(self) -> None:
+        self.location_ids: array = array('q')
+        self.item_ids: array = array('q')
+        self.player_ids: array = array('i')
+        self.flags: array = array('B')
+        self.player_is_receiving: array = array('B')
+
+    def __len__(self) -> int:
+        return len(self.location_ids)
+
+    def __contains__(self, location_id: int) -> bool:
+        return self.__find(location_id) is not None
+
+    def __iter__(self):
+        for row in range(len(self.location_ids)):
+            yield self.__item_at(row)
+
+    def __find(self, location_id: int) -> int | None:
+        row: int = bisect_left(self.location_ids, location_id)
+        if row < len(self.location_ids) and self.location_ids[row] == location_id:
+            return row
+        return None
+
+    def __item_at(self, row: int) -> APNetworkItem:
+        return APNetworkItem(self.item_ids[row], self.location_ids[row], self.player_ids[row], self.flags[row], bool(self.player_is_receiving[row]))
+
+    def __update(self, row: int, item: APNetworkItem) -> None:
+        self.item_ids[row] = item.item_id
+        self.player_ids[row] = item.player_id
+        self.flags[row] = item.type
+        self.player_is_receiving[row] = item.player_is_receiving
+
+    def __append(self, item: APNetworkItem) -> None:
+        self.location_ids.append(item.location_id)
+        self.item_ids.append(item.item_id)
+        self.player_ids.append(item.player_id)
+        self.flags.append(item.type)
+        self.player_is_receiving.append(item.player_is_receiving)
+
+    def upsert(self, item: APNetworkItem) -> bool:
+        # Returns True when the location is new
+        if not self.location_ids or item.location_id > self.location_ids[-1]:
+            # Scouts ask for locations in order, so new ones almost always go at the end
+            self.__append(item)
+            return True
+        row: int = bisect_left(self.location_ids, item.location_id)
+        if self.location_ids[row] == item.location_id:
+            self.__update(row, item)
+            return False
+        self.location_ids.insert(row, item.location_id)
+        self.item_ids.insert(row, item.item_id)
+        self.player_ids.insert(row, item.player_id)
+        self.flags.insert(row, item.type)
+        self.player_is_receiving.insert(row, item.player_is_receiving)
+        return True
+
+    def upsert_many(self, items: list[APNetworkItem]) -> list[APNetworkItem]:
+        # Returns the items whose locations are new. Out of order ones are sorted in once rather than inserted one by one.
+        new_items: list[APNetworkItem] = []
+        unordered: dict[int, APNetworkItem] = {}
+        for item in items:
+            if not self.location_ids or item.location_id > self.location_ids[-1]:
+                self.__append(item)
+                new_items.append(item)
+                continue
+            row: int | None = self.__find(item.location_id)
+            if row is None:
+                unordered[item.location_id] = item
+            else:
+                self.__update(row, item)
+        if unordered:
+            for item in unordered.values():
+                self.__append(item)
+                new_items.append(item)
+            self.__sort()
+        return new_items
+
+    def __sort(self) -> None:
+        order: list[int] = sorted(range(len(self.location_ids)), key=self.location_ids.__getitem__)
+        for name in ['location_ids', 'item_ids', 'player_ids', 'flags', 'player_is_receiving']:
+            column: array = getattr(self, name)
+            setattr(self, name, array(column.typecode, [column[row] for row in order]))
+
+    def get(self, location_id: int) -> APNetworkItem | None:
+        row: int | None = self.__find(location_id)
+        if row is None:
+            return None
+        return self.__item_at(row)
+
+    def item_id(self, location_id: int) -> int | None:
+        row: int | None = self.__find(location_id)
+        return None if row is None else self.item_ids[row]
+
+    def item_type(self, location_id: int) -> APNetworkItemType | None:
+        row: int | None = self.__find(location_id)
+        return None if row is None else APNetworkItemType(self.flags[row])
@@ -1,9 +1,105 @@
-import archipelago
+from datapackage import DEFAULT_CACHE_DIR
+import argparse
 import asyncio
+import signal
+import json
+import time
+import sys
+import os
+
+START_TIME: float = time.monotonic() # Taken before the heavy imports so time to connected covers them
+
+# Setting -> (environment variable, type, default). Settings without a default are prompted for when interactive.
+SETTINGS: dict[str, tuple[str, type, any]] = {
+    'ip': ('AP_IP', str, 'archipelago.gg'),
+    'port': ('AP_PORT', int, None),
+    'slot_name': ('AP_SLOT_NAME', str, None),
+    'password': ('AP_PASSWORD', str, ''),
+    'milestone': ('AP_MILESTONE', int, 300),
+    'wss': ('AP_WSS', bool, True),
+    'cache_dir': ('AP_CACHE_DIR', str, DEFAULT_CACHE_DIR),
+    'record': ('AP_RECORD', str, ''),
+    'metrics_port': ('AP_METRICS_PORT', int, 0),
+    'metrics_file': ('AP_METRICS_FILE', str, ''),
+    'metrics_interval': ('AP_METRICS_INTERVAL', float, 60.0),
+}
+
+PROMPTS: dict[str, str] = {
+    'ip': 'What is the server\'s IP? (Leave blank for archipelago.gg): ',
+    'port': 'What is the server\'s port?: ',
+    'slot_name': 'What is your slot\'s name?: ',
+    'password': 'What is the server\'s password? Leave blank if there isn\'t one.: ',
+}
+
+def parse_value(value: any, value_type: type) -> any:
+    if value_type is bool and isinstance(value, str):
+        return value.strip().lower() in ['1', 'true', 'yes', 'on']
+    return value_type(value)
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Nothing as a hint game for Archipelago. Settings are read from arguments, then environment variables, then the config file.')
+    parser.add_argument('--config', help='JSON file with any of: ' + ', '.join(SETTINGS), default=os.environ.get('AP_CONFIG'))
+    parser.add_argument('--ip', help='Server address (AP_IP)')
+    parser.add_argument('--port', type=int, help='Server port (AP_PORT)')
+    parser.add_argument('--slot-name', dest='slot_name', help='Slot name (AP_SLOT_NAME)')
+    parser.add_argument('--password', help='Server password (AP_PASSWORD)')
+    parser.add_argument('--milestone', type=int, help='Seconds of doing nothing per hint (AP_MILESTONE)')
+    parser.add_argument('--no-wss', dest='wss', action='store_const', const=False, help='Connect with ws:// instead of wss:// (AP_WSS=0)')
+    parser.add_argument('--cache-dir', dest='cache_dir', help='Directory for cached DataPackages and scouts (AP_CACHE_DIR)')
+    parser.add_argument('--record', help='Record every frame sent and received to this file, gzip compressed if it ends in .gz (AP_RECORD)')
+    parser.add_argument('--metrics-port', dest='metrics_port', type=int, help='Serve Prometheus metrics and profiling switches on this local port, 0 to disable (AP_METRICS_PORT)')
+    parser.add_argument('--metrics-file', dest='metrics_file', help='Write metrics as JSON to this file periodically (AP_METRICS_FILE)')
+    parser.add_argument('--metrics-interval', dest='metrics_interval', type=float, help='Seconds between metrics file writes (AP_METRICS_INTERVAL)')
+    parser.add_argument('--non-interactive', action='store_true', help='Fail instead of prompting for missing settings')
+    return parser.parse_args()
+
+def load_settings(args: argparse.Namespace) -> dict[str, any]:
+    config: dict[str, any] = {}
+    if args.config:
+        try:
+            with open(args.config) as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f'Could not read config file {args.config}: {str(e)}')
+            sys.exit(2)
+
+    interactive: bool = not args.non_interactive and sys.stdin.isatty()
+    settings: dict[str, any] = {}
+    for name, (env_name, value_type, default) in SETTINGS.items():
+        if getattr(args, name) is not None:
+            settings[name] = getattr(args, name)
+        elif env_name in os.environ:
+            settings[name] = parse_value(os.environ[env_name], value_type)
+        elif name in config:
+            settings[name] = parse_value(config[name], value_type)
+        elif interactive and name in PROMPTS:
+            value: str = input(PROMPTS[name])
+            settings[name] = parse_value(value, value_type) if value != '' or default is None else default
+        elif default is not None:
+            settings[name] = default
+        else:
+            print(f'Missing setting \'{name}\', pass --{name.replace("_", "-")} or set {env_name}')
+            sys.exit(2)
+    return settings
+
+async def run(settings: dict[str, any]) -> None:
+    # Imported after settings are known so a bad command line fails fast
+    import archipelago
+
+    # Supervisors stop services with SIGTERM, treat it like Ctrl+C so the connection is closed cleanly
+    task: asyncio.Task = asyncio.current_task()
+    if sys.platform != 'win32':
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+    try:
+        await archipelago.main(**settings, started_at=START_TIME)
+    except asyncio.CancelledError:
+        pass
+    except archipelago.APConnectionRefused:
+        sys.exit(1)
 
 if __name__ == '__main__':
-    ip: str = input(f'What is the server\'s IP? (Leave blank for archipelago.gg): ')
-    port: int = int(input(f'What is the server\'s port?: '))
-    slot_name: str = input(f'What is your slot\'s name?: ')
-    password: str = input(f'What is the server\'s password? Leave blank if there isn\'t one.: ')
-    asyncio.run(archipelago.main(ip, port, slot_name, password))
\ No newline at end of file
+    settings: dict[str, any] = load_settings(parse_args())
+    try:
+        asyncio.run(run(settings))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,240 @@
+from typing import Callable
+import tracemalloc
+import cProfile
+import asyncio
+import bisect
+import pstats
+import json
+import io
+import os
+
+LATENCY_BUCKETS: tuple[float, ...] = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+SIZE_BUCKETS: tuple[float, ...] = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+def frame_size(message: str | bytes) -> int:
+    # Bytes on the wire. Frames are nearly always ASCII, where that's the length without encoding a copy.
+    if isinstance(message, bytes) or message.isascii():
+        return len(message)
+    return len(message.encode())
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets: tuple[float, ...] = buckets
+        self.counts: list[int] = [0] * (len(buckets) + 1) # Last one is +Inf
+        self.sum: float = 0.0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        result: list[tuple[str, int]] = []
+        total: int = 0
+        for bound, count in zip([*map(str, self.buckets), '+Inf'], self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+# A collector returns samples as (name, type, labels, value), type being 'counter' or 'gauge'
+Sample = tuple[str, str, dict[str, str], float]
+
+# Histograms exported as (name, labels, histogram)
+HistogramSample = tuple[str, dict[str, str], Histogram]
+
+class Metrics:
+    def __init__(self, prefix: str = 'apnothing_', labels: dict[str, str] | None = None) -> None:
+        self.prefix: str = prefix
+        self.labels: dict[str, str] = labels if labels is not None else {} # Added to every series, e.g. the slot when hosting several
+        self.counters: dict[str, dict[tuple[tuple[str, str], ...], float]] = {}
+        self.histograms: dict[str, dict[tuple[tuple[str, str], ...], Histogram]] = {}
+        self.collectors: list[Callable[[], list[Sample]]] = []
+        self.children: list[Metrics] = []
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        series: dict[tuple[tuple[str, str], ...], float] = self.counters.setdefault(name, {})
+        key: tuple[tuple[str, str], ...] = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets: tuple[float, ...] = LATENCY_BUCKETS, **labels: str) -> None:
+        series: dict[tuple[tuple[str, str], ...], Histogram] = self.histograms.setdefault(name, {})
+        key: tuple[tuple[str, str], ...] = tuple(sorted(labels.items()))
+        histogram: Histogram | None = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def add_collector(self, collector: Callable[[], list[Sample]]) -> None:
+        # Collectors are called on every export, for values that already live elsewhere
+        self.collectors.append(collector)
+
+    def add_histogram(self, name: str, histogram: Histogram, **labels: str) -> None:
+        self.histograms.setdefault(name, {})[tuple(sorted(labels.items()))] = histogram
+
+    def add_child(self, child: 'Metrics') -> None:
+        # Children are exported along with this one, under their own labels
+        self.children.append(child)
+
+    def collect(self) -> tuple[list[Sample], list[HistogramSample]]:
+        samples: list[Sample] = []
+        for name, series in self.counters.items():
+            for key, value in series.items():
+                samples.append((name, 'counter', {**self.labels, **dict(key)}, value))
+        for collector in self.collectors:
+            samples.extend((name, kind, {**self.labels, **labels}, value) for name, kind, labels, value in collector())
+        histograms: list[HistogramSample] = [(name, {**self.labels, **dict(key)}, histogram) for name, series in self.histograms.items() for key, histogram in series.items()]
+
+        for child in self.children:
+            child_samples, child_histograms = child.collect()
+            samples.extend(child_samples)
+            histograms.extend(child_histograms)
+        return group_by_name(samples), group_by_name(histograms)
+
+    def render_prometheus(self) -> str:
+        lines: list[str] = []
+        typed: set[str] = set()
+        samples, histograms = self.collect()
+        for name, kind, labels, value in samples:
+            name = self.prefix + name
+            if name not in typed:
+                lines.append(f'# TYPE {name} {kind}')
+                typed.add(name)
+            lines.append(f'{name}{format_labels(labels)} {value}')
+        for name, labels, histogram in histograms:
+            name = self.prefix + name
+            if name not in typed:
+                lines.append(f'# TYPE {name} histogram')
+                typed.add(name)
+            for bound, count in histogram.cumulative():
+                lines.append(f'{name}_bucket{format_labels({**labels, "le": bound})} {count}')
+            lines.append(f'{name}_sum{format_labels(labels)} {histogram.sum}')
+            lines.append(f'{name}_count{format_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def to_dict(self) -> dict[str, any]:
+        result: dict[str, any] = {}
+        samples, histograms = self.collect()
+        for name, kind, labels, value in samples:
+            result.setdefault(name, []).append({'labels': labels, 'value': value})
+        for name, labels, histogram in histograms:
+            result.setdefault(name, []).append({'labels': labels, 'count': histogram.count, 'sum': histogram.sum, 'buckets': dict(histogram.cumulative())})
+        return result
+
+def group_by_name(samples: list[tuple]) -> list[tuple]:
+    # The exposition format wants every series of a metric together, first seen order is kept
+    order: dict[str, int] = {}
+    for sample in samples:
+        order.setdefault(sample[0], len(order))
+    return sorted(samples, key=lambda sample: order[sample[0]])
+
+def format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ''
+    pairs: list[str] = []
+    for key, value in labels.items():
+        escaped: str = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{key}="{escaped}"')
+    return '{' + ','.join(pairs) + '}'
+
+class Profiler:
+    # cProfile and tracemalloc, switched on and off while the client runs
+    def __init__(self) -> None:
+        self.profile: cProfile.Profile | None = None
+
+    def start_cpu(self) -> str:
+        if self.profile is not None:
+            return 'CPU profile already running\n'
+        # Profiles the thread it's started on, which is the event loop thread when started over HTTP
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+        return 'CPU profile started\n'
+
+    def stop_cpu(self, limit: int = 40) -> str:
+        if self.profile is None:
+            return 'CPU profile not running\n'
+        self.profile.disable()
+        output: io.StringIO = io.StringIO()
+        pstats.Stats(self.profile, stream=output).sort_stats('cumulative').print_stats(limit)
+        self.profile = None
+        return output.getvalue()
+
+    def start_memory(self, frames: int = 10) -> str:
+        if tracemalloc.is_tracing():
+            return 'tracemalloc already running\n'
+        tracemalloc.start(frames)
+        return 'tracemalloc started\n'
+
+    def memory_snapshot(self, limit: int = 25) -> str:
+        if not tracemalloc.is_tracing():
+            return 'tracemalloc not running\n'
+        current, peak = tracemalloc.get_traced_memory()
+        lines: list[str] = [f'Traced memory: {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB']
+        for stat in tracemalloc.take_snapshot().statistics('lineno')[:limit]:
+            lines.append(str(stat))
+        return '\n'.join(lines) + '\n'
+
+    def stop_memory(self) -> str:
+        tracemalloc.stop()
+        return 'tracemalloc stopped\n'
+
+class MetricsServer:
+    # Local HTTP endpoint: /metrics (Prometheus text), /metrics.json, and /debug/... profiling switches
+    def __init__(self, metrics: Metrics, host: str = '127.0.0.1', port: int = 9464) -> None:
+        self.metrics: Metrics = metrics
+        self.host: str = host
+        self.port: int = port
+        self.profiler: Profiler = Profiler()
+        self.server: asyncio.Server | None = None
+
+        self.routes: dict[str, Callable[[], tuple[str, str]]] = {
+            '/metrics': lambda: ('text/plain; version=0.0.4', self.metrics.render_prometheus()),
+            '/metrics.json': lambda: ('application/json', json.dumps(self.metrics.to_dict())),
+            '/debug/cpu/start': lambda: ('text/plain', self.profiler.start_cpu()),
+            '/debug/cpu/stop': lambda: ('text/plain', self.profiler.stop_cpu()),
+            '/debug/memory/start': lambda: ('text/plain', self.profiler.start_memory()),
+            '/debug/memory/snapshot': lambda: ('text/plain', self.profiler.memory_snapshot()),
+            '/debug/memory/stop': lambda: ('text/plain', self.profiler.stop_memory()),
+        }
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self.__handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        print(f'Metrics available at http://{self.host}:{self.port}/metrics')
+
+    async def stop(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def __handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line: bytes = await reader.readline()
+            while (await reader.readline()).strip():
+                pass # Headers aren't needed
+            parts: list[str] = request_line.decode(errors='replace').split()
+            route: Callable[[], tuple[str, str]] | None = self.routes.get(parts[1].split('?')[0]) if len(parts) >= 2 else None
+            if route is None:
+                status, content_type, body = '404 Not Found', 'text/plain', 'Not found\n'
+            else:
+                status = '200 OK'
+                content_type, body = route()
+            data: bytes = body.encode()
+            writer.write(f'HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n'.encode() + data)
+            await writer.drain()
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+async def dump_periodically(metrics: Metrics, path: str, interval: float = 60.0) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            with open(path + '.tmp', 'w') as f:
+                json.dump(metrics.to_dict(), f)
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            print(f'Could not write metrics to {path}: {str(e)}')
@@ -1,40 +1,82 @@
-from pymem import Pymem, process
+from enum import Enum, auto
+from typing import Callable
+from metrics import Histogram
+import threading
+import asyncio
+import time
 import sys
 
-class WindowsHelper: # Can add additional Operating Systems as new classes if needed
-    def __init__(self, exe_name: str = "Nothing.exe") -> None:
-        try:
-            self.pm: Pymem = Pymem(exe_name)
-        except Exception as e:
-            if f'Could not find process: {exe_name}' == str(e):
-                print(f'Please launch Nothing.exe')
-                sys.exit(1)
-            else:
-                print(f'Unknown error: {str(e)}')
-                sys.exit(1)
-
-        self.memory_address = self.get_memory_address()
-
-    def read_current_timer(self) -> float:
-        return self.pm.read_float(self.memory_address)
-    
-    def get_memory_address(self, module_name: str = 'mono-2.0-bdwgc.dll'):
-        module = process.module_from_name(self.pm.process_handle, module_name)
-        address = module.lpBaseOfDll + 0x0072AC60
-        address = self.pm.read_ulonglong(address) + 0x70
-        address = self.pm.read_ulonglong(address) + 0x68
-        address = self.pm.read_ulonglong(address) + 0x96C
-        return address
-        
+# Pointer chain to the timer, shared by every platform backend
+TIMER_MODULE: str = 'mono-2.0-bdwgc.dll'
+TIMER_ROOT_OFFSET: int = 0x0072AC60
+TIMER_POINTER_OFFSETS: list[int] = [0x70, 0x68, 0x96C]
+
+class TimerEventType(Enum):
+    MILESTONE = auto() # A milestone was reached and earned a hint
+    RESET = auto()     # The timer went backwards, the player did something
+    STOPPED = auto()   # The timer can no longer be read
+
+class TimerEvent:
+    def __init__(self, type: TimerEventType, value: int, milestone_count: int) -> None:
+        self.type: TimerEventType = type
+        self.value: int = value
+        self.milestone_count: int = milestone_count
+        self.timestamp: float = time.time()
+
+class ResolveBackoff:
+    # Spaces out attempts to re-resolve a pointer chain that's briefly broken, e.g. while the game reloads a scene
+    def __init__(self, initial_delay: float = 0.5, max_delay: float = 30.0, give_up_after: float = 300.0) -> None:
+        self.initial_delay: float = initial_delay
+        self.max_delay: float = max_delay
+        self.give_up_after: float = give_up_after # Seconds of nothing but failures before the timer counts as gone
+
+        self.delay: float = initial_delay
+        self.retry_at: float = 0.0
+        self.failing_since: float | None = None
+
+    def ready(self) -> bool:
+        return time.monotonic() >= self.retry_at
+
+    def failed(self) -> bool:
+        # Returns True once it's time to give up
+        now: float = time.monotonic()
+        if self.failing_since is None:
+            self.failing_since = now
+        self.retry_at = now + self.delay
+        self.delay = min(self.max_delay, self.delay * 2)
+        return now - self.failing_since >= self.give_up_after
+
+    def succeeded(self) -> None:
+        self.delay = self.initial_delay
+        self.retry_at = 0.0
+        self.failing_since = None
+
 class NothingHintGame:
-    def __init__(self, milestone: int = 300) -> None:
+    def __init__(self, milestone: int = 300, tolerance: float = 1.0, min_poll_interval: float = 0.25, max_poll_interval: float = 30.0, pid: int | None = None, helper: any = None) -> None:
         self.os: str = sys.platform
         self.milestone: int = milestone
 
-        self.hints_to_give: int = 0
+        self.tolerance: float = tolerance # Seconds a milestone may be detected late by
+        self.min_poll_interval: float = min_poll_interval
+        self.max_poll_interval: float = max_poll_interval
+        self.reads: int = 0
+        self.missed_reads: int = 0 # Ticks where the backend had no reading, while its pointer chain was broken
+        self.tick_durations: Histogram = Histogram() # Seconds per tick, mostly the memory read
+        self.start_time: float = time.monotonic()
+
+        self.listeners: list[Callable[[TimerEvent], None]] = []
 
-        if 'win32' == self.os:
-            self.helper = WindowsHelper()
+        # pid picks one game when several are running, otherwise the first one found is used
+        # Backends are imported here so only the current platform's dependencies are needed
+        # helper replaces the backend with anything that has read_current_timer(), e.g. in tests
+        if helper is not None:
+            self.helper = helper
+        elif 'win32' == self.os:
+            from nothing_windows import WindowsHelper
+            self.helper = WindowsHelper(pid=pid)
+        elif self.os.startswith('linux'):
+            from nothing_linux import LinuxHelper
+            self.helper = LinuxHelper(pid=pid)
         else:
             print(f'OS \'{self.os}\' is not supported currently.')
             sys.exit(1)
@@ -46,9 +88,18 @@ class NothingHintGame:
         self.milestone_count: int = 0
 
         self.at_start: bool = True
+        self.last_read_missed: bool = False
 
     def tick(self) -> None:
-        self.curr_value = round(self.helper.read_current_timer())
+        start: float = time.perf_counter()
+        value: float | None = self.helper.read_current_timer()
+        self.reads += 1
+        self.last_read_missed = value is None
+        if value is None:
+            self.missed_reads += 1
+            self.tick_durations.observe(time.perf_counter() - start)
+            return
+        self.curr_value = round(value)
 
         if self.curr_value == 0:
             self.at_start = False
@@ -57,6 +108,9 @@ class NothingHintGame:
             self.last_value = self.curr_value
 
         if self.curr_value < self.last_value:
+            # Polls can be far apart, so the reset is usually seen well after 0. It still means the player is doing nothing now.
+            self.at_start = False
+            self.publish(TimerEvent(TimerEventType.RESET, self.curr_value, self.milestone_count))
             self.last_value = -1
             self.curr_value = -1
             self.next_milestone = self.milestone
@@ -68,10 +122,59 @@ class NothingHintGame:
                 self.give_hint()
 
         self.last_value = self.curr_value
+        self.tick_durations.observe(time.perf_counter() - start)
+
+    def get_poll_delay(self) -> float:
+        # The timer counts up in real time, so nothing can happen to the milestone before it could have been reached.
+        # After a reset the next milestone is a full interval away, which backs polling off on its own.
+        if self.curr_value < 0 or self.last_read_missed:
+            return self.min_poll_interval
+        remaining: float = self.next_milestone - self.curr_value
+        return min(self.max_poll_interval, max(self.min_poll_interval, remaining - self.tolerance))
+
+    def get_read_rate(self) -> float:
+        elapsed: float = time.monotonic() - self.start_time
+        return self.reads / elapsed if elapsed > 0 else 0.0
+
+    def publish(self, event: TimerEvent) -> None:
+        for listener in self.listeners:
+            listener(event)
 
     def give_hint(self) -> None:
         print(f'You earned a hint for doing nothing! Giving now..')
-        self.hints_to_give += 1
+        self.publish(TimerEvent(TimerEventType.MILESTONE, self.curr_value, self.milestone_count))
+
+class TimerWorker:
+    # Polls the game timer on its own thread and hands events to an asyncio queue, so slow network work can't delay a read
+    def __init__(self, game: NothingHintGame, loop: asyncio.AbstractEventLoop, events: asyncio.Queue) -> None:
+        self.game: NothingHintGame = game
+        self.loop: asyncio.AbstractEventLoop = loop
+        self.events: asyncio.Queue[TimerEvent] = events
+
+        self.stop_event: threading.Event = threading.Event()
+        self.thread: threading.Thread = threading.Thread(target=self.__run, name='NothingTimer', daemon=True)
+
+        self.game.listeners.append(self.__publish)
+
+    def __publish(self, event: TimerEvent) -> None:
+        self.loop.call_soon_threadsafe(self.events.put_nowait, event)
+
+    def __run(self) -> None:
+        try:
+            while not self.stop_event.is_set():
+                self.game.tick()
+                self.stop_event.wait(self.game.get_poll_delay())
+        except Exception as e:
+            print(f'Could not read the timer: {str(e)}')
+        finally:
+            self.__publish(TimerEvent(TimerEventType.STOPPED, self.game.curr_value, self.game.milestone_count))
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        self.thread.join()
 
 if __name__ == "__main__":
     milestone: int = 300
@@ -0,0 +1,84 @@
+from pymem import Pymem, process
+from pymem.exception import MemoryReadError
+from nothing import TIMER_MODULE, TIMER_ROOT_OFFSET, TIMER_POINTER_OFFSETS, ResolveBackoff
+import math
+import sys
+
+class WindowsHelper:
+    def __init__(self, exe_name: str = "Nothing.exe", module_name: str = TIMER_MODULE, max_timer: float = 1e7, pid: int | None = None) -> None:
+        try:
+            self.pm: Pymem = Pymem(pid if pid is not None else exe_name)
+        except Exception as e:
+            if f'Could not find process: {exe_name}' == str(e):
+                print(f'Please launch Nothing.exe')
+                sys.exit(1)
+            else:
+                print(f'Unknown error: {str(e)}')
+                sys.exit(1)
+
+        self.module_name: str = module_name
+        self.max_timer: float = max_timer
+
+        self.re_resolutions: int = 0
+        self.read_failures: int = 0
+        self.resolve_failures: int = 0
+        self.resolved: bool = True # False while the cached chain is known to be stale
+        self.backoff: ResolveBackoff = ResolveBackoff()
+
+        self.root_pointer: int = 0
+        self.memory_address = self.get_memory_address()
+
+    def read_current_timer(self) -> float | None:
+        # None when there's no reading this time, the chain is retried on later reads with backoff
+        if not self.backoff.ready():
+            return None
+        try:
+            # Polls can be 30 s apart, so the root pointer is checked on every one. A relocated chain can leave a plausible stale float behind.
+            if not self.resolved or self.__read_root_pointer() != self.root_pointer:
+                self.__re_resolve()
+
+            value: float | None = self.__read_timer()
+            if value is None:
+                # The cached chain went stale, e.g. after a scene reload or the GC moving the object
+                self.__re_resolve()
+                value = self.__read_timer()
+        except MemoryReadError:
+            value = None # Part of the chain is null while the scene loads
+
+        if value is None:
+            self.resolved = False
+            self.resolve_failures += 1
+            if self.backoff.failed():
+                raise MemoryReadError(self.memory_address, 4)
+            return None
+        self.backoff.succeeded()
+        return value
+
+    def __read_timer(self) -> float | None:
+        try:
+            value: float = self.pm.read_float(self.memory_address)
+        except MemoryReadError:
+            self.read_failures += 1
+            return None
+        if not (math.isfinite(value) and 0 <= value < self.max_timer):
+            self.read_failures += 1
+            return None
+        return value
+
+    def __read_root_pointer(self) -> int:
+        return self.pm.read_ulonglong(self.root_address)
+
+    def __re_resolve(self) -> None:
+        self.re_resolutions += 1
+        self.resolved = False
+        self.memory_address = self.get_memory_address()
+        self.resolved = True
+
+    def get_memory_address(self) -> int:
+        module = process.module_from_name(self.pm.process_handle, self.module_name)
+        self.root_address: int = module.lpBaseOfDll + TIMER_ROOT_OFFSET
+        self.root_pointer = self.__read_root_pointer()
+        address: int = self.root_pointer
+        for offset in TIMER_POINTER_OFFSETS[:-1]:
+            address = self.pm.read_ulonglong(address + offset)
+        return address + TIMER_POINTER_OFFSETS[-1]
@@ -0,0 +1,64 @@
+from collections.abc import Iterator
+from enum import IntEnum
+import struct
+import gzip
+import zlib
+import time
+import io
+
+class FrameDirection(IntEnum):
+    INCOMING = 0
+    OUTGOING = 1
+
+class FrameRecorder:
+    # Append-only log of raw websocket messages. Each record is a header (timestamp, direction, length) followed by the message.
+    HEADER: struct.Struct = struct.Struct('<dBI')
+
+    def __init__(self, path: str, compress: bool | None = None, buffer_size: int = 1 << 16, flush_interval: float = 1.0) -> None:
+        self.path: str = path
+        # Compressed logs are gzip, appending adds a new gzip member which readers handle transparently
+        self.compress: bool = path.endswith('.gz') if compress is None else compress
+        self.raw = gzip.open(path, 'ab', compresslevel=6) if self.compress else open(path, 'ab', buffering=0)
+        self.file: io.BufferedWriter = io.BufferedWriter(self.raw, buffer_size)
+        self.frames: int = 0
+
+        # Seconds between flushes, so a crashed session leaves a log that can still be replayed up to about then
+        self.flush_interval: float = flush_interval
+        self.last_flush: float = time.time()
+
+    def record(self, direction: FrameDirection, message: str | bytes) -> None:
+        if isinstance(message, str):
+            message = message.encode()
+        timestamp: float = time.time()
+        self.file.write(self.HEADER.pack(timestamp, direction, len(message)))
+        self.file.write(message)
+        self.frames += 1
+        if timestamp - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self.file.flush()
+        if self.compress:
+            # Without a sync flush the compressor keeps everything, and a crash leaves only the gzip header
+            self.raw.flush(zlib.Z_SYNC_FLUSH)
+        self.last_flush = time.time()
+
+    def close(self) -> None:
+        self.file.close()
+
+def read_frames(path: str) -> Iterator[tuple[float, FrameDirection, bytes]]:
+    with open(path, 'rb') as f:
+        compressed: bool = f.read(2) == b'\x1f\x8b'
+    with (gzip.open(path, 'rb') if compressed else open(path, 'rb')) as f:
+        try:
+            while True:
+                header: bytes = f.read(FrameRecorder.HEADER.size)
+                if len(header) < FrameRecorder.HEADER.size:
+                    return
+                timestamp, direction, length = FrameRecorder.HEADER.unpack(header)
+                message: bytes = f.read(length)
+                if len(message) < length:
+                    return # Torn final record, the recorder was killed mid-write
+                yield timestamp, FrameDirection(direction), message
+        except EOFError:
+            return # A gzip stream cut off by a crash, everything up to its last flush has been read
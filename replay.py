@@ -0,0 +1,61 @@
+# Feeds a recorded session back through the client, for profiling parsing and hint selection offline
+# Usage: python replay.py session.log [--realtime] [--hint-every 100] [--profile]
+from archipelago import Archipelago
+from recorder import FrameDirection, read_frames
+import contextlib
+import tempfile
+import argparse
+import cProfile
+import pstats
+import time
+import os
+
+def replay(path: str, realtime: bool = False, hint_every: int = 100, verbose: bool = False) -> Archipelago:
+    with tempfile.TemporaryDirectory() as cache_dir, open(os.devnull, 'w') as devnull, contextlib.nullcontext() if verbose else contextlib.redirect_stdout(devnull):
+        # A fresh cache directory, so DataPackages and scouts come from the log instead of this machine
+        ap: Archipelago = Archipelago(0, 'Replay', cache_dir=cache_dir)
+
+        frames: int = 0
+        requests: int = 0
+        parse_time: float = 0.0
+        first_timestamp: float | None = None
+        start: float = time.perf_counter()
+        for timestamp, direction, message in read_frames(path):
+            if direction != FrameDirection.INCOMING:
+                continue # Outgoing requests are regenerated by the client itself
+            if realtime:
+                if first_timestamp is None:
+                    first_timestamp = timestamp
+                delay: float = (timestamp - first_timestamp) - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+
+            frame_start: float = time.perf_counter()
+            ap.process_data(ap.codec.loads(message))
+            frames += 1
+            if hint_every > 0 and frames % hint_every == 0:
+                ap.earn_hints()
+            parse_time += time.perf_counter() - frame_start
+            requests += len(ap.queued_requests.clear())
+        elapsed: float = time.perf_counter() - start
+
+    print(f'Replayed {frames} messages in {elapsed:.3f}s ({frames / parse_time if parse_time else 0:,.0f} messages/s of processing), {requests} requests generated')
+    for cmd_name, stats in ap.handlers.get_stats():
+        print(f'  {cmd_name}: {stats.count} frames, {stats.total_time * 1000:.1f}ms total, {stats.max_time * 1000:.2f}ms max')
+    return ap
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay a recorded session through process_data and hint_item')
+    parser.add_argument('path', help='Log written with --record')
+    parser.add_argument('--realtime', action='store_true', help='Keep the recorded timing instead of replaying as fast as possible')
+    parser.add_argument('--hint-every', type=int, default=100, help='Redeem a hint every this many frames, 0 to never')
+    parser.add_argument('--profile', action='store_true', help='Run under cProfile and print the top functions')
+    parser.add_argument('--verbose', action='store_true', help='Show the client\'s output')
+    args = parser.parse_args()
+
+    if args.profile:
+        profiler: cProfile.Profile = cProfile.Profile()
+        profiler.runcall(replay, args.path, args.realtime, args.hint_every, args.verbose)
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
+    else:
+        replay(args.path, args.realtime, args.hint_every, args.verbose)
@@ -0,0 +1,39 @@
+from ap_packets import APNetworkItem
+from datapackage import DEFAULT_CACHE_DIR
+import struct
+import os
+import re
+
+class ScoutCache:
+    # Append-only file of scouted LocationInfo results for one seed, team and slot
+    RECORD: struct.Struct = struct.Struct('<qqiBB') # location, item, player, flags, player_is_receiving
+
+    def __init__(self, seed_name: str, team: int, slot: int, cache_dir: str = DEFAULT_CACHE_DIR) -> None:
+        safe_seed: str = re.sub(r'[^A-Za-z0-9_.-]', '_', seed_name)
+        self.path: str = os.path.join(cache_dir, 'scouts', f'{safe_seed}_{team}_{slot}.bin')
+
+    def load(self) -> list[APNetworkItem]:
+        try:
+            with open(self.path, 'rb') as f:
+                data: bytes = f.read()
+        except OSError:
+            return []
+        usable: int = len(data) - len(data) % self.RECORD.size
+        if usable != len(data):
+            # Drop a torn final record from a crash mid-write so later appends stay aligned
+            try:
+                os.truncate(self.path, usable)
+            except OSError:
+                pass
+        return [APNetworkItem(location_id=location_id, item_id=item_id, player_id=player_id, flags=flags, player_is_receiving=bool(receiving)) for location_id, item_id, player_id, flags, receiving in self.RECORD.iter_unpack(data[:usable])]
+
+    def append(self, items: list[APNetworkItem]) -> None:
+        if not items:
+            return
+        data: bytes = b''.join([self.RECORD.pack(item.location_id, item.item_id, item.player_id, item.type, item.player_is_receiving) for item in items])
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'ab') as f:
+                f.write(data)
+        except OSError as e:
+            print(f'Could not cache scouted locations: {str(e)}')
@@ -0,0 +1,22 @@
+import sys
+import os
+
+# The modules live at the repository root, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SLOT: int = 1
+LOCATIONS: list[int] = [1001, 1002, 1003]
+
+# Server frames shared by the tests, for a one-slot room playing 'Game'
+def room_info(seed_name: str = 'test-seed', checksums: dict[str, str] | None = None) -> dict:
+    return {'cmd': 'RoomInfo', 'password': False, 'games': list(checksums or []), 'tags': [], 'version': {}, 'generator_version': {}, 'permissions': {},
+            'hint_cost': 10, 'location_check_points': 1, 'datapackage_checksums': checksums or {}, 'seed_name': seed_name, 'time': 0.0}
+
+def connected() -> dict:
+    return {'cmd': 'Connected', 'team': 0, 'slot': SLOT, 'missing_locations': LOCATIONS, 'checked_locations': [], 'hint_points': 0, 'slot_data': {},
+            'players': [{'class': 'NetworkPlayer', 'team': 0, 'slot': SLOT, 'alias': 'Player1', 'name': 'Player1'}],
+            'slot_info': {str(SLOT): {'class': 'NetworkSlot', 'name': 'Player1', 'game': 'Game', 'type': 1, 'group_members': []}}}
+
+def location_info(locations: list[int]) -> dict:
+    # Progression items for our own slot, so every location is a hint candidate
+    return {'cmd': 'LocationInfo', 'locations': [{'class': 'NetworkItem', 'item': 1, 'location': location_id, 'player': SLOT, 'flags': 1} for location_id in locations]}
@@ -0,0 +1,27 @@
+from archipelago import Archipelago
+from datapackage import DataPackageCache
+from conftest import room_info, connected, SLOT
+
+def data_package(checksum: str, item_name: str) -> dict:
+    return {'cmd': 'DataPackage', 'data': {'games': {'Game': {'item_name_to_id': {item_name: 1}, 'location_name_to_id': {'Spot': 1001}, 'checksum': checksum}}}}
+
+def item_name(ap: Archipelago) -> str:
+    return ap.renderer.render([{'type': 'item_id', 'text': '1', 'player': SLOT}])
+
+def test_rooms_sharing_a_cache_keep_their_own_names(tmp_path):
+    # Two rooms play the same game at different versions, as when host.py runs slots in both
+    datapackage: DataPackageCache = DataPackageCache(str(tmp_path))
+    first: Archipelago = Archipelago(0, 'Player1', cache_dir=str(tmp_path), datapackage=datapackage)
+    second: Archipelago = Archipelago(1, 'Player1', cache_dir=str(tmp_path), datapackage=datapackage)
+
+    first.process_data([room_info('seed-a', {'Game': 'old'}), data_package('old', 'Old Sword'), connected()])
+    second.process_data([room_info('seed-b', {'Game': 'new'}), data_package('new', 'New Sword'), connected()])
+    assert item_name(first) == 'Old Sword'
+    assert item_name(second) == 'New Sword'
+
+    # A later session in the first room finds its tables cached, without fetching them again
+    third: Archipelago = Archipelago(0, 'Player2', cache_dir=str(tmp_path), datapackage=datapackage)
+    third.process_data([room_info('seed-a', {'Game': 'old'})])
+    assert not [req for req in third.queued_requests.clear() if req['cmd'] == 'GetDataPackage']
+    third.process_data([connected()])
+    assert item_name(third) == 'Old Sword'
@@ -0,0 +1,65 @@
+from archipelago import Archipelago, APStatus
+from hint_ledger import HintLedger
+from conftest import room_info, connected, location_info, LOCATIONS
+import asyncio
+
+def connect(ap: Archipelago) -> None:
+    ap.process_data([room_info(), connected()])
+
+def hint_scouts(ap: Archipelago) -> list[list[int]]:
+    return [req['locations'] for req in ap.queued_requests.clear() if req['cmd'] == 'LocationScouts' and req.get('create_as_hint')]
+
+def make_client(tmp_path) -> Archipelago:
+    return Archipelago(0, 'Player1', cache_dir=str(tmp_path), ledger_path=str(tmp_path / 'ledger.bin'))
+
+def test_hinted_location_not_picked_again_after_reconnect(tmp_path):
+    ap: Archipelago = make_client(tmp_path)
+    connect(ap)
+    ap.process_data([location_info(LOCATIONS)])
+    ap.queued_requests.clear()
+
+    ap.earn_hints()
+    [[hinted]] = hint_scouts(ap)
+    ap.process_data([location_info([hinted])])
+    assert not ap.ledger.unconfirmed
+
+    # Same seed again, as after a dropped connection
+    ap.status = APStatus.DISCONNECTED
+    connect(ap)
+    assert hinted not in ap.hint_candidates
+    ap.queued_requests.clear()
+
+    ap.earn_hints(3)
+    [batch] = hint_scouts(ap)
+    assert sorted(batch) == sorted(location_id for location_id in LOCATIONS if location_id != hinted)
+    assert ap.hints_to_give == 1 # Nothing left to hint it on
+
+def test_unconfirmed_batch_replayed_after_restart(tmp_path, capsys):
+    ap: Archipelago = make_client(tmp_path)
+    connect(ap)
+    ap.process_data([location_info(LOCATIONS)])
+    ap.queued_requests.clear()
+
+    ap.earn_hints()
+    [[hinted]] = hint_scouts(ap)
+    # The client dies before the server answers
+    asyncio.run(ap.ledger.close())
+
+    capsys.readouterr()
+    restarted: Archipelago = make_client(tmp_path)
+    assert restarted.hints_to_give == 0
+    output: str = capsys.readouterr().out
+    assert 'still to give' not in output
+    assert f'Unanswered hint scouts from an earlier session: 1, sending them again for locations {hinted}' in output
+    connect(restarted)
+    # The same location again, not a new hint
+    assert hint_scouts(restarted) == [[hinted]]
+    assert hinted not in restarted.hint_candidates
+
+    restarted.process_data([location_info([hinted])])
+    assert not restarted.ledger.unconfirmed
+    asyncio.run(restarted.ledger.close())
+
+    ledger: HintLedger = HintLedger(str(tmp_path / 'ledger.bin'))
+    assert (ledger.earned, ledger.redeemed, ledger.unconfirmed) == (1, 1, {})
+    asyncio.run(ledger.close())
@@ -0,0 +1,25 @@
+from host import load_host_config
+import pytest
+import json
+
+def load(tmp_path, config: dict) -> dict:
+    path = tmp_path / 'slots.json'
+    path.write_text(json.dumps(config))
+    return load_host_config(str(path))
+
+SLOT: dict = {'port': 38281, 'slot_name': 'Player1'}
+
+def test_slots_default_to_every_timer(tmp_path):
+    host: dict = load(tmp_path, {'timers': {'desk': {}, 'laptop': {'pid': 42}}, 'slots': [SLOT]})
+    assert host['slots'][0]['timers'] == ['desk', 'laptop']
+    assert list(load(tmp_path, {'slots': [SLOT]})['timers']) == ['default']
+
+@pytest.mark.parametrize('config', [
+    {'timers': {}, 'slots': [SLOT]},
+    {'timers': {'desk': {}}, 'slots': [{**SLOT, 'timers': []}]},
+    {'timers': {'desk': {}}, 'slots': [{**SLOT, 'timers': ['laptop']}]},
+])
+def test_rejects_slots_that_can_never_earn_a_hint(tmp_path, config):
+    with pytest.raises(SystemExit) as exit:
+        load(tmp_path, config)
+    assert exit.value.code == 2
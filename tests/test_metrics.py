@@ -0,0 +1,7 @@
+from metrics import frame_size
+
+def test_frame_size_counts_bytes():
+    assert frame_size('[{"cmd":"Say"}]') == 15
+    assert frame_size(b'[{"cmd":"Say"}]') == 15
+    # Two bytes each in UTF-8
+    assert frame_size('["éé"]') == 8
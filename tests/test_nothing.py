@@ -0,0 +1,42 @@
+from nothing import NothingHintGame, TimerEvent, TimerEventType
+
+class FakeTimer:
+    # The game's timer against a clock the test moves forward
+    def __init__(self, start_value: float, reset_at: float) -> None:
+        self.now: float = 0.0
+        self.start_value: float = start_value
+        self.reset_at: float = reset_at
+
+    def read_current_timer(self) -> float:
+        if self.now < self.reset_at:
+            return self.start_value + self.now
+        return self.now - self.reset_at
+
+def run(game: NothingHintGame, timer: FakeTimer, until: float) -> list[TimerEvent]:
+    events: list[TimerEvent] = []
+    game.listeners.append(events.append)
+    while timer.now < until:
+        game.tick()
+        timer.now += game.get_poll_delay()
+    return events
+
+def test_hints_earned_when_started_with_timer_running():
+    # Started 45 s into a run, the player moves at 100 s and then does nothing
+    timer: FakeTimer = FakeTimer(start_value=45, reset_at=100)
+    game: NothingHintGame = NothingHintGame(300, helper=timer)
+    events: list[TimerEvent] = run(game, timer, 2100)
+
+    assert [event.type for event in events].count(TimerEventType.RESET) == 1
+    milestones: list[TimerEvent] = [event for event in events if event.type == TimerEventType.MILESTONE]
+    assert len(milestones) == 6
+    # Each one noticed within the tolerance of the milestone
+    assert all(event.value <= 300 * (i + 1) + game.tolerance + 1 for i, event in enumerate(milestones))
+    assert game.reads < 200
+
+def test_no_hint_for_time_before_the_client_started():
+    # Milestones of a run that was already going when the client started, with no reset seen, earn nothing
+    timer: FakeTimer = FakeTimer(start_value=45, reset_at=float('inf'))
+    game: NothingHintGame = NothingHintGame(300, helper=timer)
+    events: list[TimerEvent] = run(game, timer, 1000)
+    assert game.milestone_count > 0
+    assert not [event for event in events if event.type == TimerEventType.MILESTONE]
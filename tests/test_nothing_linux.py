@@ -0,0 +1,80 @@
+from archipelago import add_timer_metrics
+from nothing import NothingHintGame
+from nothing_linux import LinuxHelper, ProcessMemory
+from metrics import Metrics
+import subprocess
+import signal
+import pytest
+import time
+import sys
+import os
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith('linux'), reason='Reads another process\'s memory the Linux way')
+
+ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VALUE: float = 123.5
+
+@pytest.fixture
+def standin():
+    process = subprocess.Popen([sys.executable, '-m', 'benchmarks.standin_process', '0.01', '--value', str(VALUE)], cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    try:
+        assert int(process.stdout.readline()) == process.pid
+        yield process
+    finally:
+        process.terminate()
+        process.wait()
+
+def send(process: subprocess.Popen, signum: int, expected: str) -> None:
+    # The stand-in answers once the chain has changed
+    process.send_signal(signum)
+    assert process.stdout.readline().strip() == expected
+
+def test_reads_timer_and_follows_a_swapped_root(standin):
+    helper: LinuxHelper = LinuxHelper(pid=standin.pid)
+    assert helper.read_current_timer() == VALUE
+    assert helper.re_resolutions == 0
+
+    send(standin, signal.SIGUSR1, 'moved')
+    assert helper.read_current_timer() == VALUE
+    assert helper.re_resolutions == 1
+    assert helper.read_current_timer() == VALUE
+    assert helper.re_resolutions == 1
+
+def test_read_paths_agree(standin):
+    helper: LinuxHelper = LinuxHelper(pid=standin.pid)
+    requests: list[tuple[int, int]] = [(helper.root_address, 8), (0, 8), (helper.memory_address, 4)]
+    expected: list[bytes | None] = ProcessMemory(standin.pid, pread_max_requests=0).read(requests)
+    assert expected[1] is None
+    assert ProcessMemory(standin.pid).read(requests) == expected
+    without_mem: ProcessMemory = ProcessMemory(standin.pid)
+    without_mem.mem_unavailable = True # As when /proc/<pid>/mem can't be opened
+    assert without_mem.read(requests) == expected
+    assert without_mem.mem_fd is None
+
+def test_broken_chain_gives_no_reading_until_restored(standin):
+    helper: LinuxHelper = LinuxHelper(pid=standin.pid)
+    send(standin, signal.SIGUSR2, 'broken')
+    assert helper.read_current_timer() is None
+    assert helper.resolve_failures == 1
+    # Backing off, so the chain isn't walked again straight away
+    assert helper.read_current_timer() is None
+    assert helper.resolve_failures == 1
+
+    send(standin, signal.SIGUSR2, 'restored')
+    time.sleep(helper.backoff.initial_delay)
+    assert helper.read_current_timer() == VALUE
+    assert helper.resolve_failures == 1
+
+def test_timer_metrics_export_chain_counters(standin):
+    nothing: NothingHintGame = NothingHintGame(pid=standin.pid)
+    metrics: Metrics = Metrics()
+    add_timer_metrics(metrics, nothing, timer='desk')
+    send(standin, signal.SIGUSR1, 'moved')
+    nothing.tick()
+
+    samples, _ = metrics.collect()
+    values: dict[str, float] = {name: value for name, _, labels, value in samples if labels == {'timer': 'desk'}}
+    assert values['timer_re_resolutions_total'] == 1
+    assert values['timer_read_failures_total'] == 0
+    assert values['timer_resolve_failures_total'] == 0
+    assert values['timer_missed_reads_total'] == 0
@@ -0,0 +1,30 @@
+from archipelago import Archipelago
+from conftest import room_info, connected, location_info, LOCATIONS
+
+def scouts(ap: Archipelago) -> list[list[int]]:
+    return [req['locations'] for req in ap.queued_requests.clear() if req['cmd'] == 'LocationScouts' and not req.get('create_as_hint')]
+
+def test_one_scout_chunk_in_flight(tmp_path):
+    ap: Archipelago = Archipelago(0, 'Player1', cache_dir=str(tmp_path), scout_chunk_size=1)
+    ap.process_data([room_info(), connected()])
+    assert scouts(ap) == [[LOCATIONS[0]]]
+
+    # An answer for something else, e.g. a hint scout, doesn't release the next chunk
+    ap.process_data([location_info([9999])])
+    assert scouts(ap) == []
+
+    ap.process_data([location_info([LOCATIONS[0]])])
+    assert scouts(ap) == [[LOCATIONS[1]]]
+    # Answering the same chunk twice doesn't send two more
+    ap.process_data([location_info([LOCATIONS[0]])])
+    assert scouts(ap) == []
+
+def test_reconnect_rescouts_from_the_start(tmp_path):
+    ap: Archipelago = Archipelago(0, 'Player1', cache_dir=str(tmp_path), scout_chunk_size=1)
+    ap.process_data([room_info(), connected()])
+    assert scouts(ap) == [[LOCATIONS[0]]]
+
+    # The connection drops before the chunk is answered, the new one scouts from the start
+    ap.queued_requests.clear()
+    ap.process_data([room_info(), connected()])
+    assert scouts(ap) == [[LOCATIONS[0]]]